@@ -1,8 +1,9 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import chat, rag, health
+from app.api.v1.endpoints import chat, rag, health, admin
 
 api_router = APIRouter()
 
 api_router.include_router(health.router, prefix="/health", tags=["health"])
 api_router.include_router(chat.router, prefix="/chat", tags=["chat"])
-api_router.include_router(rag.router, prefix="/rag", tags=["rag"]) 
\ No newline at end of file
+api_router.include_router(rag.router, prefix="/rag", tags=["rag"]) 
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+import hmac
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response
+from typing import Optional
+from app.core.config import settings
+from app.core.profiling import get_profile, get_stage_totals, list_profiles, sample_stacks
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    # compare_digest rejects non-ASCII str, and headers arrive decoded as latin-1
+    return (
+        bool(settings.ADMIN_TOKEN) and bool(token)
+        and hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode())
+    )
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Admin endpoints are hidden unless ADMIN_TOKEN is configured and presented"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/stages")
+async def stage_timings():
+    """Cumulative timings of instrumented hot-path stages since startup"""
+    return get_stage_totals()
+
+
+@router.get("/profiles")
+async def recent_profiles():
+    """Recently profiled requests (send X-Profile: 1 with the admin token to profile one)"""
+    return list_profiles()
+
+
+@router.get("/profiles/{profile_id}")
+async def profile_detail(
+    profile_id: str,
+    format: str = Query(default="json", pattern="^(json|pstats)$")
+):
+    """Stage breakdown and cProfile output; format=pstats downloads a file for pstats/snakeviz"""
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "pstats":
+        if profile["pstats_dump"] is None:
+            raise HTTPException(status_code=404, detail="No cProfile data for this request")
+        return Response(
+            content=profile["pstats_dump"],
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+        )
+    return {key: value for key, value in profile.items() if key != "pstats_dump"}
+
+
+@router.post("/profile/sample")
+async def sample_profile(
+    seconds: float = Query(default=10.0, gt=0),
+    interval_ms: float = Query(default=10.0, ge=1.0, le=1000.0)
+):
+    """Sample all worker threads for a bounded time; returns collapsed stacks for flamegraph.pl/speedscope"""
+    seconds = min(seconds, settings.PROFILE_MAX_SAMPLE_SECONDS)
+    loop = asyncio.get_running_loop()
+    collapsed = await loop.run_in_executor(None, sample_stacks, seconds, interval_ms / 1000)
+    if collapsed is None:
+        raise HTTPException(status_code=409, detail="A sampling run is already in progress")
+    logger.info("Sampled worker stacks for %.1fs", seconds)
+    return Response(content=collapsed, media_type="text/plain")
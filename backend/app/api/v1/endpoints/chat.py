@@ -1,40 +1,92 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Request, Query, Response
+from typing import List, Optional
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_db
+from app.services.chat_persistence import get_conversation_volume
 from app.models.chat import ChatRequest, ChatResponse, ChatMessage
-from app.services.chat_service import ChatService
+from app.services.chat_service import ChatService, get_chat_service
+from app.services.admission import (
+    AdmissionRejected,
+    Priority,
+    admission_controller,
+    get_client_id,
+    get_request_timeout,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def get_chat_service() -> ChatService:
-    return ChatService()
-
-
 @router.post("/message", response_model=ChatResponse)
 async def send_message(
     request: ChatRequest,
+    http_request: Request,
     chat_service: ChatService = Depends(get_chat_service)
 ):
     """Send a message and get AI response"""
     try:
-        response = await chat_service.process_message(request)
+        client_id = get_client_id(http_request)
+        # Frequent questions are answered from the precomputed index without an LLM slot
+        async with admission_controller.admit(client_id, Priority.CHEAP):
+            response, query_embedding = await chat_service.lookup_precomputed(request)
+        if response is not None:
+            return response
+
+        async with admission_controller.admit(
+            client_id, Priority.LLM, get_request_timeout(http_request)
+        ):
+            response = await chat_service.process_message(request, query_embedding)
         return response
+    except AdmissionRejected as e:
+        raise e.to_http_exception()
     except Exception as e:
         logger.error(f"Error processing message: {e}")
         raise HTTPException(status_code=500, detail="Failed to process message")
 
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against an If-None-Match list, including '*'"""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
 @router.get("/history/{session_id}", response_model=List[ChatMessage])
 async def get_conversation_history(
     session_id: str,
+    http_request: Request,
+    cursor: Optional[int] = Query(default=None, ge=0, description="Value of X-Next-Cursor from the previous page"),
+    limit: Optional[int] = Query(default=None, ge=1, le=500),
+    since: Optional[datetime] = Query(default=None, description="Only return messages newer than this timestamp"),
     chat_service: ChatService = Depends(get_chat_service)
 ):
-    """Get conversation history for a session"""
+    """Get conversation history for a session (paginated, conditional and delta fetches)"""
     try:
-        history = await chat_service.get_conversation_history(session_id)
-        return history
+        async with admission_controller.admit(get_client_id(http_request), Priority.CHEAP):
+            etag = await chat_service.get_history_etag(session_id, cursor, limit, since)
+            if _etag_matches(http_request.headers.get("If-None-Match"), etag):
+                return Response(status_code=304, headers={"ETag": etag})
+
+            messages, next_cursor, total = await chat_service.get_history_page(
+                session_id, start=cursor or 0, limit=limit, since=since
+            )
+            headers = {"ETag": etag, "X-Total-Count": str(total)}
+            if next_cursor is not None:
+                headers["X-Next-Cursor"] = str(next_cursor)
+            return Response(
+                content=ChatMessage.encode_list(messages),
+                media_type="application/json",
+                headers=headers
+            )
+    except AdmissionRejected as e:
+        raise e.to_http_exception()
     except Exception as e:
         logger.error(f"Error getting conversation history: {e}")
         raise HTTPException(status_code=500, detail="Failed to get conversation history")
@@ -43,15 +95,32 @@ async def get_conversation_history(
 @router.delete("/history/{session_id}")
 async def clear_conversation_history(
     session_id: str,
+    http_request: Request,
     chat_service: ChatService = Depends(get_chat_service)
 ):
     """Clear conversation history for a session"""
     try:
-        success = await chat_service.clear_conversation_history(session_id)
-        if success:
-            return {"message": "Conversation history cleared successfully"}
-        else:
-            raise HTTPException(status_code=404, detail="Session not found")
+        async with admission_controller.admit(get_client_id(http_request), Priority.CHEAP):
+            success = await chat_service.clear_conversation_history(session_id)
+    except AdmissionRejected as e:
+        raise e.to_http_exception()
     except Exception as e:
         logger.error(f"Error clearing conversation history: {e}")
-        raise HTTPException(status_code=500, detail="Failed to clear conversation history") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to clear conversation history")
+    if success:
+        return {"message": "Conversation history cleared successfully"}
+    else:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+
+@router.get("/analytics/volume")
+async def conversation_volume(
+    days: int = Query(default=7, ge=1, le=365),
+    db: AsyncSession = Depends(get_db)
+):
+    """Daily conversation and message volume"""
+    try:
+        return {"days": days, "volume": await get_conversation_volume(db, days)}
+    except Exception as e:
+        logger.error(f"Error getting conversation volume: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get conversation volume")
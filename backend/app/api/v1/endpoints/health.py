@@ -1,5 +1,12 @@
 from fastapi import APIRouter
 from datetime import datetime
+from app.core.logging import get_logging_stats
+from app.db.session import get_pool_stats
+from app.services.admission import admission_controller
+from app.services.chat_persistence import chat_write_buffer
+from app.services.feed_ingestor import get_feed_stats
+from app.services.answer_index import answer_index
+from app.services.user_service import get_auth_cache_stats
 
 router = APIRouter()
 
@@ -21,4 +28,18 @@ async def readiness_check():
         "status": "ready",
         "timestamp": datetime.utcnow(),
         "service": "chatbot-api"
-    } 
\ No newline at end of file
+    } 
+
+@router.get("/metrics")
+async def metrics():
+    """Runtime metrics for pools and caches"""
+    return {
+        "timestamp": datetime.utcnow(),
+        "db_pool": get_pool_stats(),
+        "auth_cache": get_auth_cache_stats(),
+        "logging": get_logging_stats(),
+        "admission": admission_controller.stats(),
+        "chat_write_buffer": chat_write_buffer.stats(),
+        "feed_ingestion": get_feed_stats(),
+        "answer_index": answer_index.stats()
+    }
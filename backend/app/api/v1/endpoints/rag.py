@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request
 from typing import List
-from app.services.chat_service import ChatService
+from app.services.chat_service import ChatService, get_chat_service
+from app.services.admission import AdmissionRejected, Priority, admission_controller, get_client_id
 import logging
 import os
 
@@ -8,12 +9,9 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def get_chat_service() -> ChatService:
-    return ChatService()
-
-
 @router.post("/documents")
 async def add_documents(
+    http_request: Request,
     files: List[UploadFile] = File(...),
     chat_service: ChatService = Depends(get_chat_service)
 ):
@@ -28,22 +26,27 @@ async def add_documents(
                 buffer.write(content)
             file_paths.append(file_path)
         
-        success = await chat_service.add_documents_to_rag(file_paths)
-        
-        # Clean up temporary files
-        for file_path in file_paths:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        
-        if success:
-            return {"message": f"Successfully added {len(files)} documents to RAG system"}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to add documents")
+        # Embedding uploaded files competes with generation for the same CPU/GPU
+        try:
+            async with admission_controller.admit(get_client_id(http_request), Priority.LLM):
+                success = await chat_service.add_documents_to_rag(file_paths)
+        finally:
+            # Clean up temporary files
+            for file_path in file_paths:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
             
+    except AdmissionRejected as e:
+        raise e.to_http_exception()
     except Exception as e:
         logger.error(f"Error adding documents: {e}")
         raise HTTPException(status_code=500, detail="Failed to add documents")
 
+    if success:
+        return {"message": f"Successfully added {len(files)} documents to RAG system"}
+    else:
+        raise HTTPException(status_code=500, detail="Failed to add documents")
+
 
 @router.get("/stats")
 async def get_rag_stats(
@@ -61,17 +64,21 @@ async def get_rag_stats(
 @router.post("/search")
 async def search_documents(
     query: str,
+    http_request: Request,
     k: int = 5,
     chat_service: ChatService = Depends(get_chat_service)
 ):
     """Search for similar documents"""
     try:
-        results = await chat_service.rag_service.search_similar(query, k=k)
+        async with admission_controller.admit(get_client_id(http_request), Priority.CHEAP):
+            results = await chat_service.rag_service.search_similar(query, k=k)
         return {
             "query": query,
             "results": results,
             "count": len(results)
         }
+    except AdmissionRejected as e:
+        raise e.to_http_exception()
     except Exception as e:
         logger.error(f"Error searching documents: {e}")
         raise HTTPException(status_code=500, detail="Failed to search documents") 
\ No newline at end of file
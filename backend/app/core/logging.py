@@ -1,18 +1,175 @@
+import json
 import logging
+import queue
+import random
 import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
 from app.core.config import settings
 
+# Correlation ID of the request being handled, set by the request-id middleware
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+
+RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of INFO-and-below records from high-volume loggers"""
+
+    def __init__(self, rate: float, loggers):
+        super().__init__()
+        self.rate = rate
+        self.loggers = tuple(loggers)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1.0 or record.levelno > logging.INFO:
+            return True
+        if not record.name.startswith(self.loggers):
+            return True
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hand records to the listener thread, dropping them when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._exc_formatter = logging.Formatter()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge args and render tracebacks here; JSON encoding happens off-thread
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RequestIdMiddleware:
+    """Tag every log line of a request with a correlation ID.
+
+    Plain ASGI rather than BaseHTTPMiddleware, which adds a task and a
+    streaming wrapper to every request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = ""
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        request_id = request_id or uuid.uuid4().hex
+        header = (b"x-request-id", request_id.encode("latin-1"))
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+
+
+class DrainingQueueListener(QueueListener):
+    """Queue listener whose stop() waits for room instead of failing on a full queue"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
 def setup_logging():
-    """Setup logging configuration"""
+    """Route all logging through a bounded queue drained by a background thread"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    formatter = JsonFormatter()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    file_handler = RotatingFileHandler(
+        settings.LOG_FILE,
+        maxBytes=settings.LOG_MAX_BYTES,
+        backupCount=settings.LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(SamplingFilter(settings.LOG_INFO_SAMPLE_RATE, settings.LOG_SAMPLED_LOGGERS))
+
+    _listener = DrainingQueueListener(log_queue, stream_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+
     logging.basicConfig(
         level=getattr(logging, settings.LOG_LEVEL),
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler("app.log")
-        ]
+        handlers=[_queue_handler],
+        force=True
     )
-    
+
     # Set specific loggers
     logging.getLogger("uvicorn").setLevel(logging.INFO)
-    logging.getLogger("fastapi").setLevel(logging.INFO) 
\ No newline at end of file
+    logging.getLogger("fastapi").setLevel(logging.INFO)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        _listener = None
+
+
+def get_logging_stats() -> dict:
+    if _queue_handler is None:
+        return {"status": "not_initialized"}
+    return {
+        "queued": _queue_handler.queue.qsize(),
+        "capacity": settings.LOG_QUEUE_SIZE,
+        "dropped": _queue_handler.dropped,
+    }
@@ -0,0 +1,202 @@
+import cProfile
+import functools
+import inspect
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+# Per-request stage timings, only set while a request is being profiled
+_request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+
+# Process-wide totals: stage -> [calls, total_s, max_s]
+_stage_totals: Dict[str, list] = {}
+_totals_lock = threading.Lock()
+
+# cProfile can only be active once per interpreter at a time
+_cprofile_lock = threading.Lock()
+_sampler_lock = threading.Lock()
+
+_profiles: "OrderedDict[str, dict]" = OrderedDict()
+
+
+def _record(name: str, elapsed: float):
+    # Stages also run in executor threads, so updates must not interleave
+    with _totals_lock:
+        totals = _stage_totals.get(name)
+        if totals is None:
+            totals = _stage_totals[name] = [0, 0.0, 0.0]
+        totals[0] += 1
+        totals[1] += elapsed
+        if elapsed > totals[2]:
+            totals[2] = elapsed
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[name] = stages.get(name, 0.0) + elapsed
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as a named stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def timed(name: str):
+    """Decorator timing a sync or async function as a named stage; cheap enough to leave on"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _record(name, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def get_stage_totals() -> dict:
+    with _totals_lock:
+        snapshot = [(name, tuple(values)) for name, values in _stage_totals.items()]
+    return {
+        name: {
+            "calls": calls,
+            "total_ms": round(total * 1000, 2),
+            "avg_ms": round(total / calls * 1000, 3) if calls else 0.0,
+            "max_ms": round(peak * 1000, 2),
+        }
+        for name, (calls, total, peak) in sorted(snapshot)
+    }
+
+
+class RequestProfile:
+    """Collects stage timings and, when available, a cProfile for one request.
+
+    cProfile sees every coroutine the event loop runs while the request is in
+    flight, so concurrent requests show up in the dump; the stage breakdown is
+    per-request.
+    """
+
+    def __init__(self, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.path = path
+        self.stages: Dict[str, float] = {}
+        self._profiler: Optional[cProfile.Profile] = None
+        self._token = None
+        self._start = 0.0
+        self.total = 0.0
+
+    def __enter__(self):
+        self._token = _request_stages.set(self.stages)
+        if _cprofile_lock.acquire(blocking=False):
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Another profiler (e.g. a debugger) is already active
+                self._profiler = None
+                _cprofile_lock.release()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.total = time.perf_counter() - self._start
+        if self._profiler is not None:
+            self._profiler.disable()
+            _cprofile_lock.release()
+        _request_stages.reset(self._token)
+        self._store()
+        return False
+
+    def server_timing(self) -> str:
+        parts = [f"{name.replace(' ', '_')};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={self.total * 1000:.2f}")
+        return ", ".join(parts)
+
+    def _store(self):
+        entry = {
+            "id": self.id,
+            "path": self.path,
+            "created_at": time.time(),
+            "total_ms": round(self.total * 1000, 2),
+            "stages_ms": {name: round(s * 1000, 2) for name, s in self.stages.items()},
+            "pstats": None,
+            "pstats_dump": None,
+        }
+        if self._profiler is not None:
+            stats = pstats.Stats(self._profiler, stream=io.StringIO())
+            stats.sort_stats("cumulative").print_stats(settings.PROFILE_PSTATS_LINES)
+            entry["pstats"] = stats.stream.getvalue()
+            entry["pstats_dump"] = marshal.dumps(stats.stats)
+        _profiles[self.id] = entry
+        while len(_profiles) > settings.PROFILE_KEEP:
+            _profiles.popitem(last=False)
+
+
+def get_profile(profile_id: str) -> Optional[dict]:
+    return _profiles.get(profile_id)
+
+
+def list_profiles() -> list:
+    return [
+        {key: entry[key] for key in ("id", "path", "created_at", "total_ms")}
+        for entry in reversed(_profiles.values())
+    ]
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def sample_stacks(seconds: float, interval: float) -> Optional[str]:
+    """Sample every thread's stack for `seconds`; returns collapsed stacks for flame graphs.
+
+    Blocks the calling thread, so run it in an executor. Returns None if another
+    sampling run is already in progress.
+    """
+    if not _sampler_lock.acquire(blocking=False):
+        return None
+    try:
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        counts: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                counts[";".join(reversed(stack))] += 1
+            time.sleep(interval)
+        return "\n".join(f"{stack} {count}" for stack, count in counts.most_common())
+    finally:
+        _sampler_lock.release()
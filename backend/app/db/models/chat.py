@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger, Text, ForeignKey
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class ChatSessionModel(Base):
+    __tablename__ = "chat_sessions"
+    
+    session_id = Column(String, primary_key=True)
+    user_id = Column(String, index=True, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_activity = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    message_count = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<ChatSession {self.session_id}>"
+
+
+class ChatMessageModel(Base):
+    __tablename__ = "chat_messages"
+    
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    session_id = Column(String, ForeignKey("chat_sessions.session_id", ondelete="CASCADE"), index=True, nullable=False)
+    role = Column(String(16), nullable=False)
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<ChatMessage {self.session_id}:{self.id}>"
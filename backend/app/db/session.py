@@ -0,0 +1,70 @@
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.db.base import Base
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Swap a sync driver in DATABASE_URL for its asyncio counterpart"""
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def _create_engine():
+    url = to_async_url(settings.DATABASE_URL)
+    if url.startswith("sqlite"):
+        # SQLite has no server-side pool; share one connection for in-memory databases
+        kwargs = {"connect_args": {"check_same_thread": False}}
+        if ":memory:" in url or url.endswith("://"):
+            kwargs["poolclass"] = StaticPool
+        return create_async_engine(url, **kwargs)
+
+    return create_async_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
+engine = _create_engine()
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency yielding a pooled session"""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def init_db():
+    """Create tables that do not exist yet"""
+    # Import models so they register on Base.metadata
+    from app.db.models import chat, user  # noqa: F401
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+def get_pool_stats() -> dict:
+    """Connection pool counters for the metrics endpoint"""
+    pool = engine.pool
+    stats = {"pool_class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    stats["status"] = pool.status()
+    return stats
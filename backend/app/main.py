@@ -1,14 +1,22 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
+import logging
 
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.core.logging import setup_logging
+from app.core.logging import RequestIdMiddleware, setup_logging, shutdown_logging
+from app.core.profiling import RequestProfile
+from app.api.v1.endpoints.admin import is_admin_token
+from app.db.session import engine, init_db
+from app.services.chat_persistence import chat_write_buffer
+from app.services.chat_service import get_chat_service
+from app.services.feed_ingestor import start_feed_ingestor, stop_feed_ingestor
 
 # Setup logging
 setup_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Chatbot API",
@@ -25,8 +33,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count", "X-Request-ID", "Retry-After", "Server-Timing", "X-Profile-Id"],
 )
 
+
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    """Profile a single request when an admin sends X-Profile: 1"""
+    if request.headers.get("X-Profile") != "1" or not is_admin_token(request.headers.get("X-Admin-Token")):
+        return await call_next(request)
+    with RequestProfile(request.url.path) as profile:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = profile.server_timing()
+    response.headers["X-Profile-Id"] = profile.id
+    return response
+
+
+# Outermost, so the ID is set for everything below and echoed on every response
+app.add_middleware(RequestIdMiddleware)
+
+
+@app.on_event("startup")
+async def on_startup():
+    try:
+        await init_db()
+    except Exception as e:
+        # Chat and RAG do not need the database; keep serving them
+        logger.error(f"Database initialisation failed: {e}")
+    chat_write_buffer.start()
+    if settings.FEED_PATH:
+        start_feed_ingestor(get_chat_service().rag_service)
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await stop_feed_ingestor()
+    await chat_write_buffer.stop()
+    await engine.dispose()
+    shutdown_logging()
+
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import List, Optional
 from datetime import datetime
 from enum import Enum
@@ -16,6 +16,18 @@ class ChatMessage(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     session_id: Optional[str] = None
 
+    _json: Optional[bytes] = PrivateAttr(default=None)
+
+    def to_json_bytes(self) -> bytes:
+        """Serialized message, encoded once and reused (messages are not edited after creation)"""
+        if self._json is None:
+            self._json = self.model_dump_json().encode()
+        return self._json
+
+    @staticmethod
+    def encode_list(messages: List["ChatMessage"]) -> bytes:
+        return b"[" + b",".join(m.to_json_bytes() for m in messages) + b"]"
+
 
 class ChatRequest(BaseModel):
     message: str
@@ -30,6 +42,7 @@ class ChatResponse(BaseModel):
     timestamp: datetime
     sources: Optional[List[str]] = Field(default=None)
     processing_time: Optional[float] = Field(default=None)
+    context_compression: Optional[dict] = Field(default=None)
 
 
 class ChatSession(BaseModel):
@@ -0,0 +1,259 @@
+import asyncio
+import ipaddress
+import logging
+import math
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(str, Enum):
+    LLM = "llm"      # generation and embedding work
+    CHEAP = "cheap"  # cache hits, search, history reads
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def to_http_exception(self) -> HTTPException:
+        return HTTPException(
+            status_code=self.status_code,
+            detail=self.reason,
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+
+class _Waiter:
+    __slots__ = ("future", "deadline", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, deadline: float):
+        self.future = future
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+
+
+class _Lane:
+    def __init__(self, limit: int, queue_size: int):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.waiters: "deque[_Waiter]" = deque()
+        self.avg_service_s = 1.0
+        self.avg_wait_s = 0.0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+        self.expired = 0
+
+    def estimated_wait(self) -> float:
+        return self.avg_service_s * (len(self.waiters) + 1) / self.limit
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.estimated_wait()))
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self.waiters),
+            "queue_size": self.queue_size,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_deadline": self.rejected_deadline,
+            "expired_in_queue": self.expired,
+            "avg_wait_ms": round(self.avg_wait_s * 1000, 1),
+            "avg_service_ms": round(self.avg_service_s * 1000, 1),
+        }
+
+
+class AdmissionController:
+    """Concurrency limits and a bounded, deadline-aware wait queue per priority class"""
+
+    EWMA_ALPHA = 0.2
+
+    def __init__(
+        self,
+        llm_concurrency: int,
+        cheap_concurrency: int,
+        per_client_limit: int,
+        queue_size: int,
+        max_wait_seconds: float,
+    ):
+        self.per_client_limit = per_client_limit
+        self.max_wait_seconds = max_wait_seconds
+        self._lanes = {
+            Priority.LLM: _Lane(llm_concurrency, queue_size),
+            Priority.CHEAP: _Lane(cheap_concurrency, queue_size),
+        }
+        self._per_client: Dict[str, int] = defaultdict(int)
+        self.rejected_client_limit = 0
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        return cls(
+            llm_concurrency=settings.ADMISSION_LLM_CONCURRENCY,
+            cheap_concurrency=settings.ADMISSION_CHEAP_CONCURRENCY,
+            per_client_limit=settings.ADMISSION_PER_CLIENT_LIMIT,
+            queue_size=settings.ADMISSION_QUEUE_SIZE,
+            max_wait_seconds=settings.ADMISSION_MAX_WAIT_SECONDS,
+        )
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        client_id: str,
+        priority: Priority = Priority.LLM,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[None]:
+        """Hold a slot in the priority lane for the duration of the block"""
+        lane = self._lanes[priority]
+        # Per-client limits only guard the expensive lane
+        limited = priority is Priority.LLM
+        if limited and self._per_client.get(client_id, 0) >= self.per_client_limit:
+            self.rejected_client_limit += 1
+            raise AdmissionRejected(429, "Too many concurrent requests", lane.retry_after())
+
+        if limited:
+            self._per_client[client_id] += 1
+        try:
+            waited = await self._acquire(lane, timeout)
+            started = time.monotonic()
+            try:
+                yield
+            finally:
+                self._release(lane)
+                service = time.monotonic() - started
+                lane.avg_service_s += self.EWMA_ALPHA * (service - lane.avg_service_s)
+                lane.avg_wait_s += self.EWMA_ALPHA * (waited - lane.avg_wait_s)
+        finally:
+            if limited:
+                self._per_client[client_id] -= 1
+                if not self._per_client[client_id]:
+                    del self._per_client[client_id]
+
+    async def _acquire(self, lane: _Lane, timeout: Optional[float]) -> float:
+        if lane.active < lane.limit and not lane.waiters:
+            lane.active += 1
+            lane.admitted += 1
+            return 0.0
+
+        if len(lane.waiters) >= lane.queue_size:
+            lane.rejected_queue_full += 1
+            raise AdmissionRejected(503, "Server busy, queue full", lane.retry_after())
+
+        budget = self.max_wait_seconds if timeout is None else min(timeout, self.max_wait_seconds)
+        # Shed now rather than queue work that would miss its deadline anyway
+        if lane.estimated_wait() > budget:
+            lane.rejected_deadline += 1
+            raise AdmissionRejected(503, "Server busy, try again later", lane.retry_after())
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), time.monotonic() + budget)
+        lane.waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter.future}, timeout=budget)
+        except BaseException:
+            self._abandon(lane, waiter)
+            raise
+
+        if not waiter.future.done():
+            self._abandon(lane, waiter)
+            lane.expired += 1
+            raise AdmissionRejected(503, "Timed out waiting for capacity", lane.retry_after())
+        waiter.future.result()  # re-raises rejection set by _release
+        lane.admitted += 1
+        return time.monotonic() - waiter.enqueued_at
+
+    def _abandon(self, lane: _Lane, waiter: _Waiter):
+        if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+            # The slot was handed over just as we gave up; pass it on
+            self._release(lane)
+            return
+        waiter.future.cancel()
+        try:
+            lane.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self, lane: _Lane):
+        lane.active -= 1
+        now = time.monotonic()
+        while lane.waiters and lane.active < lane.limit:
+            waiter = lane.waiters.popleft()
+            if waiter.future.done():
+                continue
+            if waiter.deadline <= now:
+                lane.expired += 1
+                waiter.future.set_exception(
+                    AdmissionRejected(503, "Timed out waiting for capacity", lane.retry_after())
+                )
+                continue
+            lane.active += 1
+            waiter.future.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "lanes": {priority.value: lane.stats() for priority, lane in self._lanes.items()},
+            "clients_in_flight": len(self._per_client),
+            "rejected_client_limit": self.rejected_client_limit,
+        }
+
+
+def _parse_networks(entries) -> list:
+    networks = []
+    for entry in entries:
+        try:
+            networks.append(ipaddress.ip_network(entry.strip(), strict=False))
+        except ValueError:
+            logger.error(f"Ignoring invalid TRUSTED_PROXIES entry: {entry}")
+    return networks
+
+
+_trusted_proxies = _parse_networks(settings.TRUSTED_PROXIES)
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+
+def get_client_id(request: Request) -> str:
+    """Identify the caller for per-client limits"""
+    peer = request.client.host if request.client else None
+    # Only a configured proxy (the frontend nginx) may name the original address;
+    # clients reaching the published backend port directly could spoof it otherwise
+    real_ip = request.headers.get("X-Real-IP")
+    if real_ip and peer and _is_trusted_proxy(peer):
+        return real_ip.strip()
+    return peer or "anonymous"
+
+
+def get_request_timeout(request: Request) -> Optional[float]:
+    """Optional client deadline in seconds from the X-Request-Timeout header.
+
+    0 means "do not queue"; missing, negative or non-finite values are ignored.
+    """
+    try:
+        timeout = float(request.headers["X-Request-Timeout"])
+    except (KeyError, ValueError):
+        return None
+    if not math.isfinite(timeout) or timeout < 0:
+        return None
+    return timeout
+
+
+admission_controller = AdmissionController.from_settings()
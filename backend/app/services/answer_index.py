@@ -0,0 +1,147 @@
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, field
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_question(text: str) -> str:
+    """Case-, punctuation- and whitespace-insensitive form used for exact matches"""
+    return " ".join(_PUNCT_RE.sub(" ", text.lower()).split())
+
+
+@dataclass
+class PrecomputedAnswer:
+    question: str
+    answer: str
+    embedding: List[float]
+    sources: List[str] = field(default_factory=list)
+    source_keys: List[str] = field(default_factory=list)
+    aliases: List[str] = field(default_factory=list)
+    support: int = 0
+    created_at: float = field(default_factory=time.time)
+
+
+class AnswerIndex:
+    """In-memory lookup of pre-generated answers, persisted as a JSON file"""
+
+    def __init__(self, path: str, threshold: float, reload_interval: float = 30.0):
+        self.path = path
+        self.threshold = threshold
+        self.reload_interval = reload_interval
+        self._lock = Lock()
+        self._answers: List[PrecomputedAnswer] = []
+        self._by_text: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._mtime = 0.0
+        self._checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = 0
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            answers = [PrecomputedAnswer(**item) for item in json.load(f)]
+        self._set(answers)
+        self._mtime = os.path.getmtime(self.path)
+        logger.info("Loaded %d precomputed answers", len(answers))
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([asdict(a) for a in self._answers], f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+    def replace(self, answers: List[PrecomputedAnswer]):
+        self._set(answers)
+        self.save()
+
+    def _set(self, answers: List[PrecomputedAnswer]):
+        by_text = {}
+        for i, answer in enumerate(answers):
+            for text in [answer.question, *answer.aliases]:
+                by_text.setdefault(normalize_question(text), i)
+        matrix = None
+        if answers:
+            matrix = np.asarray([a.embedding for a in answers], dtype=np.float32)
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+        with self._lock:
+            self._answers, self._by_text, self._matrix = answers, by_text, matrix
+
+    def _maybe_reload(self, force: bool = False):
+        """Pick up a file rewritten by the offline job"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            if os.path.exists(self.path) and os.path.getmtime(self.path) != self._mtime:
+                self.load()
+        except Exception as e:
+            logger.error(f"Error reloading answer index: {e}")
+
+    def lookup(self, question: str, embed_query: Callable[[str], List[float]]) -> Optional[PrecomputedAnswer]:
+        """Exact normalized match first, then nearest question by cosine similarity"""
+        self._maybe_reload()
+        with self._lock:
+            answers, by_text, matrix = self._answers, self._by_text, self._matrix
+        if not answers:
+            return None
+
+        index = by_text.get(normalize_question(question))
+        if index is None:
+            query = np.asarray(embed_query(question), dtype=np.float32)
+            scores = matrix @ (query / (np.linalg.norm(query) + 1e-12))
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                index = best
+
+        if index is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return answers[index]
+
+    def invalidate_sources(self, source_keys: Iterable[str]) -> int:
+        """Drop answers built from any of the changed sources"""
+        changed = set(source_keys)
+        # Never overwrite a newer file from the offline job with a stale copy
+        self._maybe_reload(force=True)
+        if not changed or not self._answers:
+            return 0
+        keep = [a for a in self._answers if not changed.intersection(a.source_keys)]
+        removed = len(self._answers) - len(keep)
+        if removed:
+            self._set(keep)
+            self.save()
+            self.invalidated += removed
+            logger.info("Invalidated %d precomputed answers after re-ingestion", removed)
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._answers),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidated": self.invalidated,
+        }
+
+
+answer_index = AnswerIndex(settings.ANSWER_INDEX_PATH, settings.ANSWER_MATCH_THRESHOLD)
@@ -6,6 +6,7 @@ import logging
 import google.generativeai as genai
 
 from app.core.config import settings
+from app.core.profiling import timed
 from app.models.chat import ChatMessage, MessageRole
 
 logger = logging.getLogger(__name__)
@@ -22,6 +23,7 @@ class GeminiService:
         # model có thể là "gemini-flash" hoặc "gemini-pro"
         self.model = getattr(settings, "GEMINI_MODEL", "gemini-flash")
 
+    @timed("llm.generate")
     async def generate_response(
         self,
         messages: List[ChatMessage],
@@ -50,7 +52,10 @@ class GeminiService:
         try:
             answer = await loop.run_in_executor(None, sync_call)
             elapsed = time.time() - start
-            logger.info(f"Gemini response generated in {elapsed:.2f}s")
+            logger.info(
+                "Gemini response generated in %.2fs", elapsed,
+                extra={"stage": "llm", "duration_s": round(elapsed, 4)}
+            )
             return answer
 
         except Exception as e:
@@ -68,7 +73,8 @@ class GeminiService:
         # Tạo system message
         context_text = "\n".join(context)
         system_content = (
-            "You are a helpful AI assistant. Use the following context to answer the user's question:\n\n"
+            "You are a helpful AI assistant. Use the following context to answer the user's question. "
+            "Passages may be prefixed with a source number such as [1]:\n\n"
             f"{context_text}\n\n"
             "If the context doesn't contain relevant information, please say so politely."
         )
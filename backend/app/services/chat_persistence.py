@@ -0,0 +1,268 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.models.chat import ChatMessageModel, ChatSessionModel
+from app.db.session import AsyncSessionLocal
+from app.models.chat import ChatMessage, MessageRole
+
+logger = logging.getLogger(__name__)
+
+# Errors that mean the database is unreachable rather than that a row is bad
+_UNAVAILABLE = (OperationalError, InterfaceError, OSError)
+
+
+class ChatWriteBuffer:
+    """Write-behind buffer that batches chat messages into the database off the request path"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        batch_size: int,
+        flush_interval: float,
+        max_pending: int,
+        append_timeout: float,
+        max_retries: int = 3,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.append_timeout = append_timeout
+        self.max_retries = max_retries
+        self._pending: Deque[tuple] = deque()
+        self._flush_wanted = asyncio.Event()
+        self._space_available = asyncio.Event()
+        self._space_available.set()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self._head_failures = 0
+        self.written = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+
+    async def append(self, session_id: str, messages: List[ChatMessage], user_id: Optional[str] = None) -> bool:
+        """Queue messages for persistence; waits briefly when full, then drops"""
+        if len(self._pending) + len(messages) > self.max_pending:
+            self._space_available.clear()
+            self._flush_wanted.set()
+            try:
+                await asyncio.wait_for(self._space_available.wait(), timeout=self.append_timeout)
+            except asyncio.TimeoutError:
+                pass
+            if len(self._pending) + len(messages) > self.max_pending:
+                self.dropped += len(messages)
+                logger.warning("Chat write buffer full, dropped %d messages", len(messages))
+                return False
+
+        for message in messages:
+            # Postgres text columns reject NUL even though it is valid JSON
+            content = message.content.replace("\x00", "")
+            self._pending.append((session_id, user_id, message.role.value, content, message.timestamp))
+        if len(self._pending) >= self.batch_size:
+            self._flush_wanted.set()
+        return True
+
+    async def load_session(self, session_id: str) -> List[ChatMessage]:
+        """Full history of a session: stored messages followed by any still buffered"""
+        # Holding the flush lock means no batch is half-way between the buffer and the table
+        async with self._flush_lock:
+            async with self.session_factory() as db:
+                result = await db.execute(
+                    select(ChatMessageModel.role, ChatMessageModel.content, ChatMessageModel.created_at)
+                    .where(ChatMessageModel.session_id == session_id)
+                    .order_by(ChatMessageModel.id)
+                )
+                rows = result.all()
+            rows.extend(
+                (role, content, timestamp)
+                for sid, _, role, content, timestamp in self._pending
+                if sid == session_id
+            )
+        return [
+            ChatMessage(
+                role=MessageRole(role), content=content,
+                timestamp=_as_naive_utc(timestamp), session_id=session_id
+            )
+            for role, content, timestamp in rows
+        ]
+
+    async def delete_session(self, session_id: str) -> bool:
+        """Remove a session's buffered and stored messages; returns whether there were any"""
+        async with self._flush_lock:
+            before = len(self._pending)
+            self._pending = deque(row for row in self._pending if row[0] != session_id)
+            dropped = before - len(self._pending)
+            async with self.session_factory() as db:
+                result = await db.execute(delete(ChatMessageModel).where(ChatMessageModel.session_id == session_id))
+                await db.execute(delete(ChatSessionModel).where(ChatSessionModel.session_id == session_id))
+                await db.commit()
+        return bool(dropped or result.rowcount)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write everything still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._pending:
+            if not await self.flush():
+                break
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wanted.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wanted.clear()
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """Write up to one batch; on failure the rows go back to the front of the buffer.
+
+        After max_retries failures in a row the batch is written row by row and
+        rows the database rejects are dropped, so one bad row cannot block the rest.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return True
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            start = time.perf_counter()
+            try:
+                if self._head_failures >= self.max_retries:
+                    batch = await self._write_rows(batch)
+                    if batch:
+                        raise ConnectionError("database unavailable while isolating rejected rows")
+                else:
+                    await self._write_batch(batch)
+            except Exception as e:
+                self.failed_flushes += 1
+                self._head_failures += 1
+                self._pending.extendleft(reversed(batch))
+                logger.error(f"Error flushing chat messages: {e}")
+                return False
+            finally:
+                if len(self._pending) < self.max_pending:
+                    self._space_available.set()
+
+            self._head_failures = 0
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            if len(self._pending) >= self.batch_size:
+                self._flush_wanted.set()
+            return True
+
+    async def _write_batch(self, batch: List[tuple]):
+        async with self.session_factory() as db:
+            await self._write(db, batch)
+            await db.commit()
+        self.written += len(batch)
+
+    async def _write_rows(self, batch: List[tuple]) -> List[tuple]:
+        """Write rows one at a time, dropping those the database rejects; returns unwritten rows"""
+        for i, row in enumerate(batch):
+            try:
+                await self._write_batch([row])
+            except Exception as e:
+                if isinstance(e, _UNAVAILABLE) or getattr(e, "connection_invalidated", False):
+                    # The database itself is unavailable; keep everything not yet written
+                    return batch[i:]
+                self.rejected += 1
+                logger.error(f"Dropped chat message rejected by the database: {e}")
+        return []
+
+    @staticmethod
+    async def _write(db: AsyncSession, batch: List[tuple]):
+        sessions = {}
+        for session_id, user_id, _, _, timestamp in batch:
+            entry = sessions.setdefault(
+                session_id,
+                {"session_id": session_id, "user_id": user_id, "created_at": timestamp,
+                 "last_activity": timestamp, "message_count": 0},
+            )
+            entry["last_activity"] = max(entry["last_activity"], timestamp)
+            entry["message_count"] += 1
+
+        dialect_insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+        stmt = dialect_insert(ChatSessionModel).values(list(sessions.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ChatSessionModel.session_id],
+            set_={
+                "last_activity": stmt.excluded.last_activity,
+                "message_count": ChatSessionModel.message_count + stmt.excluded.message_count,
+            },
+        )
+        await db.execute(stmt)
+
+        # executemany over a plain INSERT is batched into multi-row VALUES by SQLAlchemy
+        await db.execute(
+            insert(ChatMessageModel),
+            [
+                {"session_id": session_id, "role": role, "content": content, "created_at": timestamp}
+                for session_id, _, role, content, timestamp in batch
+            ],
+        )
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+            "written": self.written,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+def _as_naive_utc(timestamp: datetime) -> datetime:
+    """ChatMessage timestamps are naive UTC; drivers may return aware values"""
+    if timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+async def get_conversation_volume(db: AsyncSession, days: int = 7) -> List[dict]:
+    """Daily session and message counts over the last `days` days"""
+    since = datetime.utcnow() - timedelta(days=days)
+    day = func.date(ChatMessageModel.created_at)
+    result = await db.execute(
+        select(
+            day.label("day"),
+            func.count(func.distinct(ChatMessageModel.session_id)).label("sessions"),
+            func.count(ChatMessageModel.id).label("messages"),
+        )
+        .where(ChatMessageModel.created_at >= since)
+        .group_by(day)
+        .order_by(day)
+    )
+    return [{"day": str(row.day), "sessions": row.sessions, "messages": row.messages} for row in result]
+
+
+chat_write_buffer = ChatWriteBuffer(
+    AsyncSessionLocal,
+    batch_size=settings.CHAT_PERSIST_BATCH_SIZE,
+    flush_interval=settings.CHAT_PERSIST_FLUSH_INTERVAL,
+    max_pending=settings.CHAT_PERSIST_MAX_PENDING,
+    append_timeout=settings.CHAT_PERSIST_APPEND_TIMEOUT,
+    max_retries=settings.CHAT_PERSIST_MAX_RETRIES,
+)
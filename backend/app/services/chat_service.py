@@ -1,11 +1,20 @@
 import asyncio
+import hashlib
 import time
 import uuid
-from typing import List, Optional
-from datetime import datetime
+from bisect import bisect_right
+from threading import Lock
+from typing import List, Optional, Tuple
+from datetime import datetime, timezone
 from app.models.chat import ChatMessage, ChatResponse, MessageRole, ChatRequest
 from app.services.api_service import GeminiService
 from app.services.rag_service import RAGService
+from app.services.chat_persistence import chat_write_buffer
+from app.services.context_compressor import ContextCompressor
+from app.services.answer_index import answer_index
+from app.core.config import settings
+from app.core.profiling import stage, timed
+from app.utils.cache import TTLCache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,9 +24,28 @@ class ChatService:
     def __init__(self):
         self.ai_service = GeminiService()
         self.rag_service = RAGService()
-        self.conversation_history = {}  # In production, use Redis or database
+        # Hot copy of recent sessions; the durable copy is written behind to the database
+        self.conversation_history = TTLCache(
+            settings.CHAT_HISTORY_IDLE_SECONDS, settings.CHAT_HISTORY_MAX_SESSIONS
+        )
+        self.write_buffer = chat_write_buffer
+        self.compressor = ContextCompressor(
+            self.rag_service.embeddings,
+            self.rag_service.chunker.counter,
+            settings.CONTEXT_TOKEN_BUDGET
+        )
+        self.answer_index = answer_index
+        if settings.ANSWER_INDEX_ENABLED:
+            try:
+                self.answer_index.load()
+            except Exception as e:
+                logger.error(f"Error loading answer index: {e}")
+            self.rag_service.change_listeners.append(self.answer_index.invalidate_sources)
     
-    async def process_message(self, request: ChatRequest) -> ChatResponse:
+    @timed("chat.process_message")
+    async def process_message(
+        self, request: ChatRequest, query_embedding: Optional[List[float]] = None
+    ) -> ChatResponse:
         """Process a chat message and generate response"""
         try:
             start_time = time.time()
@@ -27,11 +55,12 @@ class ChatService:
             
             # Get context if RAG is enabled
             context = []
+            compression = None
             if request.use_rag:
-                context = await self.rag_service.get_context_for_query(request.message)
+                context, compression = await self._retrieve_context(request.message, query_embedding)
             
             # Get conversation history for the session
-            history = self.conversation_history.get(session_id, [])
+            history = await self._get_history(session_id) or []
             
             # Generate response
             if context and request.use_rag:
@@ -48,14 +77,7 @@ class ChatService:
             # Calculate processing time
             processing_time = time.time() - start_time
             
-            # Store in conversation history (simplified - use database in production)
-            if session_id not in self.conversation_history:
-                self.conversation_history[session_id] = []
-            
-            self.conversation_history[session_id].extend([
-                ChatMessage(role=MessageRole.USER, content=request.message),
-                ChatMessage(role=MessageRole.ASSISTANT, content=response_text)
-            ])
+            await self._record_turn(session_id, request.message, response_text)
             
             # Create response
             response = ChatResponse(
@@ -63,34 +85,169 @@ class ChatService:
                 session_id=session_id,
                 timestamp=datetime.utcnow(),
                 sources=context if context else None,
-                processing_time=processing_time
+                processing_time=processing_time,
+                context_compression=compression
             )
             
-            logger.info(f"Processed message in {processing_time:.2f}s")
+            logger.info(
+                "Processed message in %.2fs", processing_time,
+                extra={"session_id": session_id, "duration_s": round(processing_time, 4)}
+            )
             return response
             
         except Exception as e:
             logger.error(f"Error processing message: {e}")
             raise
     
+    @timed("chat.answer_index_lookup")
+    async def lookup_precomputed(
+        self, request: ChatRequest
+    ) -> Tuple[Optional[ChatResponse], Optional[List[float]]]:
+        """Serve a pre-generated answer for a frequent question, skipping retrieval and the LLM.
+
+        Also returns the query embedding if one was computed, so a miss can reuse it for retrieval.
+        """
+        if not settings.ANSWER_INDEX_ENABLED or not request.use_rag or request.context:
+            return None, None
+        # Canned answers ignore the conversation, so only use them to open a session
+        if request.session_id and await self._get_history(request.session_id):
+            return None, None
+        embedded: List[List[float]] = []
+
+        def embed_query(text: str) -> List[float]:
+            embedded.append(self.rag_service.embeddings.embed_query(text))
+            return embedded[-1]
+
+        try:
+            start_time = time.time()
+            # Embedding the query blocks, so run the whole lookup off the event loop
+            hit = await asyncio.to_thread(self.answer_index.lookup, request.message, embed_query)
+            query_embedding = embedded[0] if embedded else None
+            if hit is None:
+                return None, query_embedding
+
+            session_id = request.session_id or str(uuid.uuid4())
+            await self._record_turn(session_id, request.message, hit.answer)
+            processing_time = time.time() - start_time
+            logger.info(
+                "Served precomputed answer in %.3fs", processing_time,
+                extra={"session_id": session_id, "stage": "answer_index"}
+            )
+            return ChatResponse(
+                message=hit.answer,
+                session_id=session_id,
+                timestamp=datetime.utcnow(),
+                sources=hit.sources or None,
+                processing_time=processing_time
+            ), query_embedding
+        except Exception as e:
+            logger.error(f"Error looking up precomputed answer: {e}")
+            return None, None
+
+    async def _get_history(self, session_id: str, create: bool = False) -> Optional[List[ChatMessage]]:
+        """Hot history for a session, reloading it from the database after eviction or restart"""
+        history = self.conversation_history.get(session_id)
+        if history is None:
+            try:
+                history = await self.write_buffer.load_session(session_id)
+            except Exception as e:
+                logger.error(f"Error loading conversation history: {e}")
+                # Do not cache a partial copy; the next request retries the load
+                return [] if create else None
+            # Another request may have loaded or started the session meanwhile
+            history = self.conversation_history.get(session_id) or history
+            if not history and not create:
+                return None
+        # Re-inserting refreshes the idle timeout and LRU position
+        self.conversation_history.set(session_id, history)
+        return history
+
+    async def _record_turn(self, session_id: str, user_message: str, response_text: str):
+        """Store a question/answer pair in the hot history and the write-behind buffer"""
+        new_messages = [
+            ChatMessage(role=MessageRole.USER, content=user_message, session_id=session_id),
+            ChatMessage(role=MessageRole.ASSISTANT, content=response_text, session_id=session_id)
+        ]
+        history = await self._get_history(session_id, create=True)
+        history.extend(new_messages)
+        await self.write_buffer.append(session_id, new_messages)
+
+    async def _retrieve_context(
+        self, query: str, query_embedding: Optional[List[float]] = None
+    ) -> Tuple[List[str], Optional[dict]]:
+        """Retrieve chunks and, if enabled, cut them down to the query-relevant sentences"""
+        documents, query_embedding = await self.rag_service.get_context_documents(
+            query, query_embedding=query_embedding
+        )
+        if not documents:
+            return [], None
+        if not settings.CONTEXT_COMPRESSION_ENABLED:
+            return [doc.page_content for doc in documents], None
+
+        with stage("context.compress"):
+            # to_thread copies the context, so stages timed in the worker reach the request profile
+            compressed = await asyncio.to_thread(self.compressor.compress, query_embedding, documents)
+        logger.info(
+            "Compressed context %d -> %d tokens",
+            compressed.report.get("original_tokens", 0),
+            compressed.report.get("compressed_tokens", 0),
+            extra={"stage": "context_compression", **compressed.report}
+        )
+        return compressed.passages, compressed.report
+
     async def get_conversation_history(self, session_id: str) -> List[ChatMessage]:
         """Get conversation history for a session"""
         try:
-            return self.conversation_history.get(session_id, [])
+            return await self._get_history(session_id) or []
         except Exception as e:
             logger.error(f"Error getting conversation history: {e}")
             return []
     
+    async def get_history_page(
+        self,
+        session_id: str,
+        start: int = 0,
+        limit: Optional[int] = None,
+        since: Optional[datetime] = None
+    ) -> Tuple[List[ChatMessage], Optional[int], int]:
+        """Slice of a session's history: (messages, next start index or None, total)"""
+        history = await self._get_history(session_id) or []
+        total = len(history)
+        if since is not None:
+            if since.tzinfo is not None:
+                since = since.astimezone(timezone.utc).replace(tzinfo=None)
+            # History is append-only, so timestamps are already sorted
+            start = max(start, bisect_right(history, since, key=lambda m: m.timestamp))
+        end = total if limit is None else min(total, start + limit)
+        next_start = end if end < total else None
+        return history[start:end], next_start, total
+
+    async def get_history_etag(
+        self,
+        session_id: str,
+        start: Optional[int] = None,
+        limit: Optional[int] = None,
+        since: Optional[datetime] = None
+    ) -> str:
+        """Changes whenever a turn is added or the session is cleared; pages and deltas get their own tag"""
+        history = await self._get_history(session_id) or []
+        last = history[-1].timestamp.timestamp() if history else 0
+        tag = f"{len(history)}-{last:.6f}"
+        if start is not None or limit is not None or since is not None:
+            window = f"{start}|{limit}|{since.isoformat() if since else None}"
+            tag += "-" + hashlib.sha1(window.encode()).hexdigest()[:12]
+        return f'W/"{tag}"'
+
     async def clear_conversation_history(self, session_id: str) -> bool:
         """Clear conversation history for a session"""
+        cached = self.conversation_history.get(session_id) is not None
+        self.conversation_history.pop(session_id)
         try:
-            if session_id in self.conversation_history:
-                del self.conversation_history[session_id]
-                return True
-            return False
+            # Otherwise the stored copy would be reloaded on the next read
+            return await self.write_buffer.delete_session(session_id) or cached
         except Exception as e:
             logger.error(f"Error clearing conversation history: {e}")
-            return False
+            return cached
     
     async def add_documents_to_rag(self, file_paths: List[str]) -> bool:
         """Add documents to RAG system"""
@@ -106,4 +263,19 @@ class ChatService:
             return self.rag_service.get_database_stats()
         except Exception as e:
             logger.error(f"Error getting RAG stats: {e}")
-            return {"total_documents": 0, "status": "error"} 
\ No newline at end of file
+            return {"total_documents": 0, "status": "error"} 
+
+_chat_service: Optional[ChatService] = None
+_chat_service_lock = Lock()
+
+
+def get_chat_service() -> ChatService:
+    """Process-wide ChatService so models and session state are shared across requests"""
+    global _chat_service
+    if _chat_service is None:
+        # Sync dependencies run in FastAPI's threadpool; build the service exactly once
+        with _chat_service_lock:
+            if _chat_service is None:
+                _chat_service = ChatService()
+    return _chat_service
+
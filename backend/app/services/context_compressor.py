@@ -0,0 +1,75 @@
+import logging
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+from langchain.schema import Document
+
+from app.core.profiling import stage
+from app.utils.text_chunker import TokenCounter, split_sentences
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CompressedContext:
+    passages: List[str]
+    report: dict = field(default_factory=dict)
+
+
+class ContextCompressor:
+    """Keep only the retrieved sentences most similar to the query, within a token budget"""
+
+    def __init__(self, embeddings, counter: TokenCounter, token_budget: int):
+        self.embeddings = embeddings
+        self.counter = counter
+        self.token_budget = token_budget
+
+    def compress(self, query_embedding: List[float], documents: List[Document]) -> CompressedContext:
+        owners, sentences = [], []
+        for doc_index, doc in enumerate(documents):
+            # Split per line first so table rows stay separate sentences
+            for line in doc.page_content.splitlines():
+                for sentence in split_sentences(line):
+                    owners.append(doc_index)
+                    sentences.append(sentence)
+        if not sentences:
+            return CompressedContext(passages=[], report={})
+
+        tokens = np.asarray(self.counter.count_many(sentences))
+        with stage("context.embed_sentences"):
+            matrix = np.asarray(self.embeddings.embed_documents(sentences), dtype=np.float32)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        scores = (matrix @ query) / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+
+        keep = np.zeros(len(sentences), dtype=bool)
+        used = 0
+        for i in np.argsort(-scores):
+            if used + tokens[i] > self.token_budget and keep.any():
+                continue
+            keep[i] = True
+            used += int(tokens[i])
+
+        # Reassemble kept sentences per source in their original order
+        passages = []
+        for doc_index, doc in enumerate(documents):
+            kept = [sentences[i] for i in range(len(sentences)) if keep[i] and owners[i] == doc_index]
+            if kept:
+                passages.append(f"[{doc_index + 1}] ({self._label(doc)}) {' '.join(kept)}")
+
+        original = int(tokens.sum())
+        report = {
+            "original_tokens": original,
+            "compressed_tokens": used,
+            "reduction": round(1 - used / original, 3) if original else 0.0,
+            "sentences_total": len(sentences),
+            "sentences_kept": int(keep.sum()),
+            "token_budget": self.token_budget,
+        }
+        return CompressedContext(passages=passages, report=report)
+
+    @staticmethod
+    def _label(doc: Document) -> str:
+        source = doc.metadata.get("source", "unknown")
+        section = doc.metadata.get("section")
+        return f"{source} / {section}" if section else source
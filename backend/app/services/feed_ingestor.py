@@ -0,0 +1,289 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from langchain.schema import Document
+
+from app.core.config import settings
+from app.services.rag_service import RAGService
+
+logger = logging.getLogger(__name__)
+
+FEED_EXTENSIONS = (".jsonl", ".txt", ".pdf", ".docx", ".doc")
+
+# Errors that mean the index is unreachable rather than that an item is bad
+_UNAVAILABLE = (ConnectionError, TimeoutError, OSError)
+
+
+def _parse_time(value) -> Optional[float]:
+    """Accept epoch seconds or ISO-8601 strings"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class FeedIngestor:
+    """Tail a directory or JSONL feed and micro-batch new items into the vector index.
+
+    JSONL lines look like ``{"key": "...", "text": "...", "published_at": ...,
+    "expires_at": ..., "source": ...}``; a line with ``"delete": true`` removes
+    the key. Other supported files in a watched directory are upserted whole,
+    keyed by their relative path, whenever their mtime changes.
+    """
+
+    def __init__(
+        self,
+        rag_service: RAGService,
+        path: str,
+        poll_interval: float,
+        batch_size: int,
+        expiry_interval: float,
+        max_retries: int = 3,
+    ):
+        self.rag_service = rag_service
+        self.path = path
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.expiry_interval = expiry_interval
+        self.max_retries = max_retries
+        self._offsets: Dict[str, int] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._last_expiry = 0.0
+        self._previous_poll = 0.0
+        self._failed_polls = 0
+        self.items_ingested = 0
+        self.items_deleted = 0
+        self.chunks_written = 0
+        self.errors = 0
+        self.rejected = 0
+        self.last_lag_s: Optional[float] = None
+        self.max_lag_s = 0.0
+        self.last_batch_at: Optional[float] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Feed ingestion watching %s", self.path)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                # Scanning, chunking and embedding all block, so keep them off the loop
+                await loop.run_in_executor(None, self.poll_once)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error ingesting feed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def poll_once(self):
+        """Collect everything new since the last poll and index it in batches.
+
+        After max_retries failed polls in a row items are upserted one at a
+        time and those the index rejects are skipped, so one bad item cannot
+        hold back the feed.
+        """
+        try:
+            self._poll()
+        except Exception:
+            self._failed_polls += 1
+            raise
+        self._failed_polls = 0
+
+    def _poll(self):
+        # Anything found now appeared after the previous scan began, which bounds its lag
+        seen_after, self._previous_poll = self._previous_poll, time.time()
+        upserts, deletes, offsets, mtimes = self._collect()
+        if deletes:
+            self.rag_service.delete_documents(deletes)
+            self.items_deleted += len(deletes)
+
+        keys = list(upserts)
+        isolate = self._failed_polls >= self.max_retries
+        for i in range(0, len(keys), self.batch_size):
+            batch = {key: upserts[key][0] for key in keys[i:i + self.batch_size]}
+            if isolate:
+                batch = self._upsert_items(batch)
+            else:
+                self.chunks_written += self.rag_service.upsert_documents(batch)
+            indexed_at = time.time()
+            for key in batch:
+                lag = indexed_at - max(upserts[key][1], seen_after)
+                self.last_lag_s = lag
+                self.max_lag_s = max(self.max_lag_s, lag)
+            self.items_ingested += len(batch)
+            self.last_batch_at = indexed_at
+
+        if upserts or deletes:
+            self.rag_service.vector_db.persist()
+            logger.info("Feed batch: %d upserted, %d deleted", len(upserts), len(deletes))
+        # Advance only once everything read is indexed; a failed poll re-reads the same items
+        self._offsets.update(offsets)
+        self._mtimes.update(mtimes)
+
+        now = time.time()
+        if now - self._last_expiry >= self.expiry_interval:
+            self.rag_service.expire_documents(now)
+            self._last_expiry = now
+
+    def _upsert_items(self, batch: Dict[str, Document]) -> Dict[str, Document]:
+        """Upsert items one at a time, skipping those the index rejects; returns those written"""
+        written = {}
+        for key, doc in batch.items():
+            try:
+                self.chunks_written += self.rag_service.upsert_documents({key: doc})
+            except _UNAVAILABLE:
+                raise
+            except Exception as e:
+                self.rejected += 1
+                logger.error(f"Skipping feed item {key} rejected by the index: {e}")
+                continue
+            written[key] = doc
+        return written
+
+    def _collect(self) -> Tuple[Dict[str, Tuple[Document, float]], List[str], Dict[str, int], Dict[str, float]]:
+        """New upserts and deletes, plus the file offsets and mtimes to record once they are indexed"""
+        # Later items for the same key win, so a burst of updates is indexed once
+        upserts: Dict[str, Tuple[Document, float]] = {}
+        deletes: List[str] = []
+        offsets: Dict[str, int] = {}
+        mtimes: Dict[str, float] = {}
+        for path in self._watched_files():
+            if path.endswith(".jsonl"):
+                for item in self._tail_jsonl(path, offsets):
+                    try:
+                        self._apply_item(item, upserts, deletes)
+                    except Exception as e:
+                        self.errors += 1
+                        logger.warning("Skipping invalid feed item in %s: %s", path, e)
+            else:
+                self._collect_file(path, upserts, mtimes)
+        return upserts, deletes, offsets, mtimes
+
+    def _watched_files(self) -> List[str]:
+        if os.path.isfile(self.path):
+            return [self.path]
+        files = []
+        for root, _, names in os.walk(self.path):
+            files.extend(os.path.join(root, name) for name in names if name.lower().endswith(FEED_EXTENSIONS))
+        return sorted(files)
+
+    def _tail_jsonl(self, path: str, offsets: Dict[str, int]):
+        offset = self._offsets.get(path, 0)
+        if os.path.getsize(path) < offset:
+            offset = 0  # truncated or rotated
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # Leave a partially written last line for the next poll
+        end = data.rfind(b"\n") + 1
+        offsets[path] = offset + end
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                self.errors += 1
+                logger.warning("Skipping malformed feed line in %s", path)
+
+    def _apply_item(self, item: dict, upserts: dict, deletes: list):
+        if not isinstance(item, dict):
+            raise ValueError("item is not an object")
+        key = item.get("key")
+        if not isinstance(key, str) or not key:
+            raise ValueError("missing or non-string key")
+        if item.get("delete"):
+            upserts.pop(key, None)
+            deletes.append(key)
+            return
+        text = item.get("text") or ""
+        source = item.get("source") or key
+        if not isinstance(text, str) or not isinstance(source, str):
+            raise ValueError("text and source must be strings")
+        if not text.strip():
+            return
+
+        published_at = _parse_time(item.get("published_at"))
+        metadata = {"source": source}
+        if published_at:
+            metadata["published_at"] = published_at
+        expires_at = _parse_time(item.get("expires_at"))
+        if expires_at:
+            metadata["expires_at"] = expires_at
+        upserts[key] = (Document(page_content=text, metadata=metadata), published_at or time.time())
+
+    def _collect_file(self, path: str, upserts: dict, mtimes: Dict[str, float]):
+        mtime = os.path.getmtime(path)
+        if self._mtimes.get(path) == mtime:
+            return
+        mtimes[path] = mtime
+        docs = self.rag_service._load_file(path)
+        if not docs:
+            return
+        key = os.path.relpath(path, self.path) if os.path.isdir(self.path) else os.path.basename(path)
+        text = "\n\n".join(doc.page_content for doc in docs)
+        metadata = {"source": key, "published_at": mtime}
+        upserts[f"file:{key}"] = (Document(page_content=text, metadata=metadata), mtime)
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "items_ingested": self.items_ingested,
+            "items_deleted": self.items_deleted,
+            "chunks_written": self.chunks_written,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "last_lag_s": round(self.last_lag_s, 3) if self.last_lag_s is not None else None,
+            "max_lag_s": round(self.max_lag_s, 3),
+            "last_batch_at": self.last_batch_at,
+        }
+
+
+feed_ingestor: Optional[FeedIngestor] = None
+
+
+def start_feed_ingestor(rag_service: RAGService):
+    """Start tailing FEED_PATH if configured"""
+    global feed_ingestor
+    if not settings.FEED_PATH or feed_ingestor is not None:
+        return
+    feed_ingestor = FeedIngestor(
+        rag_service,
+        settings.FEED_PATH,
+        poll_interval=settings.FEED_POLL_INTERVAL,
+        batch_size=settings.FEED_BATCH_SIZE,
+        expiry_interval=settings.FEED_EXPIRY_INTERVAL,
+        max_retries=settings.FEED_MAX_RETRIES,
+    )
+    feed_ingestor.start()
+
+
+async def stop_feed_ingestor():
+    if feed_ingestor is not None:
+        await feed_ingestor.stop()
+
+
+def get_feed_stats() -> dict:
+    if feed_ingestor is None:
+        return {"status": "disabled"}
+    return feed_ingestor.stats()
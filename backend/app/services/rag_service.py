@@ -1,11 +1,12 @@
 import os
+import time
 import asyncio
 import logging
-from typing import List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.vectorstores import Chroma
+from langchain.schema import Document
 from langchain.document_loaders import (
     TextLoader,
     PyPDFLoader,
@@ -13,21 +14,31 @@ from langchain.document_loaders import (
 )
 
 from app.core.config import settings
+from app.core.profiling import stage, timed
+from app.utils.text_chunker import StructureAwareChunker, split_documents_parallel
 
 logger = logging.getLogger(__name__)
 
 
+def source_key(metadata: dict) -> Optional[str]:
+    """Identity of the document a chunk came from, stable across re-ingestion"""
+    return metadata.get("doc_key") or metadata.get("source")
+
+
 class RAGService:
     def __init__(self):
         self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
+            model_name=settings.EMBEDDING_MODEL
         )
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.CHUNK_SIZE,
-            chunk_overlap=settings.CHUNK_OVERLAP
+        self.chunker = StructureAwareChunker(
+            chunk_tokens=settings.CHUNK_TOKENS,
+            overlap_tokens=settings.CHUNK_OVERLAP_TOKENS,
+            model_name=settings.EMBEDDING_MODEL
         )
         self.vector_db_path = settings.VECTOR_DB_PATH
         self.vector_db = None
+        # Called with the set of source keys whose chunks were replaced or removed
+        self.change_listeners: List[Callable[[Set[str]], None]] = []
         self._initialize_vector_db()
     
     def _initialize_vector_db(self):
@@ -46,39 +57,53 @@ class RAGService:
             logger.error(f"Error initializing vector database: {e}")
             raise
     
+    @timed("rag.add_documents")
     async def add_documents(self, file_paths: List[str]) -> bool:
         """Add .txt, .pdf, .docx files to the vector database"""
         try:
-            raw_docs = []
-
-            for path in file_paths:
-                if os.path.isfile(path):
-                    raw_docs.extend(self._load_file(path))
-                elif os.path.isdir(path):
-                    # walk directory to find supported extensions
-                    for root, _, files in os.walk(path):
-                        for fname in files:
-                            full = os.path.join(root, fname)
-                            raw_docs.extend(self._load_file(full))
-            
-            if not raw_docs:
+            total = 0
+            batch = []
+            sources = set()
+            ingested_at = time.time()
+            for chunk in split_documents_parallel(
+                self.chunker, self._iter_documents(file_paths), settings.CHUNKER_WORKERS
+            ):
+                chunk.metadata["ingested_at"] = ingested_at
+                sources.add(source_key(chunk.metadata))
+                batch.append(chunk)
+                if len(batch) >= settings.INGEST_BATCH_SIZE:
+                    self.vector_db.add_documents(batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                self.vector_db.add_documents(batch)
+                total += len(batch)
+
+            if not total:
                 logger.warning("No documents found to add")
                 return False
 
-            # Split into chunks
-            chunks = self.text_splitter.split_documents(raw_docs)
-
-            # Add & persist
-            self.vector_db.add_documents(chunks)
             self.vector_db.persist()
+            self._notify_changed(sources)
 
-            logger.info(f"Added {len(chunks)} chunks to vector database")
+            logger.info("Added %d chunks to vector database", total, extra={"chunks": total})
             return True
 
         except Exception as e:
             logger.error(f"Error adding documents: {e}")
             return False
 
+    def _iter_documents(self, file_paths: List[str]) -> Iterator:
+        """Yield loaded documents one file at a time instead of loading the corpus up front"""
+        for path in file_paths:
+            if os.path.isfile(path):
+                yield from self._load_file(path)
+            elif os.path.isdir(path):
+                # walk directory to find supported extensions
+                for root, _, files in os.walk(path):
+                    for fname in files:
+                        yield from self._load_file(os.path.join(root, fname))
+
     def _load_file(self, file_path: str):
         """Dispatch loader based on file extension"""
         ext = file_path.lower().split('.')[-1]
@@ -97,9 +122,79 @@ class RAGService:
             logger.error(f"Failed to load {file_path}: {e}")
             return []
 
+    @timed("rag.upsert_documents")
+    def upsert_documents(self, documents: Dict[str, Document]) -> int:
+        """Replace all chunks stored under each document key (blocking; run in an executor)"""
+        if not documents:
+            return 0
+        keys = list(documents)
+        self.vector_db._collection.delete(where={"doc_key": {"$in": keys}})
+
+        chunks, ids = [], []
+        ingested_at = time.time()
+        for key, doc in documents.items():
+            doc.metadata.update(doc_key=key, ingested_at=ingested_at)
+            for chunk in self.chunker.split_documents([doc]):
+                chunks.append(chunk)
+                ids.append(f"{key}:{chunk.metadata['chunk_index']}")
+        if chunks:
+            self.vector_db.add_documents(chunks, ids=ids)
+        self._notify_changed(keys)
+        return len(chunks)
+
+    def delete_documents(self, keys: List[str]):
+        if keys:
+            self.vector_db._collection.delete(where={"doc_key": {"$in": keys}})
+            self._notify_changed(keys)
+
+    def expire_documents(self, now: Optional[float] = None):
+        """Drop chunks whose expires_at has passed"""
+        expired = self.vector_db._collection.get(
+            where={"expires_at": {"$lt": now or time.time()}}, include=["metadatas"]
+        )
+        if expired["ids"]:
+            self.vector_db._collection.delete(ids=expired["ids"])
+            self._notify_changed(source_key(m) for m in expired["metadatas"])
+
+    def _notify_changed(self, keys: Iterable[Optional[str]]):
+        changed = {key for key in keys if key}
+        if not changed:
+            return
+        for listener in self.change_listeners:
+            try:
+                listener(changed)
+            except Exception as e:
+                logger.error(f"Error in change listener: {e}")
+
+    @timed("rag.vector_search")
+    def _search(self, query_embedding: List[float], k: int) -> List[Document]:
+        """Vector search re-ranked with a time-decay boost for fresh content"""
+        if settings.RECENCY_WEIGHT <= 0:
+            return self.vector_db.similarity_search_by_vector(query_embedding, k=k)
+
+        candidates = self.vector_db.similarity_search_by_vector_with_relevance_scores(
+            query_embedding, k=k * settings.RECENCY_CANDIDATE_MULTIPLIER
+        )
+        now = time.time()
+        half_life = settings.RECENCY_HALF_LIFE_MINUTES * 60
+        scored = []
+        for doc, distance in candidates:
+            similarity = 1.0 / (1.0 + distance)
+            timestamp = doc.metadata.get("published_at")
+            if not timestamp and settings.RECENCY_USE_INGESTED_AT:
+                timestamp = doc.metadata.get("ingested_at")
+            boost = 0.0
+            if timestamp:
+                boost = 0.5 ** (max(now - timestamp, 0.0) / half_life)
+            scored.append((similarity * (1.0 + settings.RECENCY_WEIGHT * boost), doc))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [doc for _, doc in scored[:k]]
+
     async def search_similar(self, query: str, k: int = 5) -> List[str]:
         try:
-            results = self.vector_db.similarity_search(query, k=k)
+            with stage("rag.embed_query"):
+                query_embedding = self.embeddings.embed_query(query)
+            results = self._search(query_embedding, k)
             return [doc.page_content for doc in results]
         except Exception as e:
             logger.error(f"Error searching similar documents: {e}")
@@ -108,6 +203,19 @@ class RAGService:
     async def get_context_for_query(self, query: str, k: int = 3) -> List[str]:
         return await self.search_similar(query, k)
 
+    async def get_context_documents(
+        self, query: str, k: int = 3, query_embedding: Optional[List[float]] = None
+    ) -> Tuple[List[Document], List[float]]:
+        """Retrieved chunks with metadata, plus the query embedding so callers can reuse it"""
+        try:
+            if query_embedding is None:
+                with stage("rag.embed_query"):
+                    query_embedding = self.embeddings.embed_query(query)
+            return self._search(query_embedding, k), query_embedding
+        except Exception as e:
+            logger.error(f"Error retrieving context documents: {e}")
+            return [], []
+
     def get_database_stats(self) -> dict:
         try:
             if not self.vector_db:
@@ -1,51 +1,75 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import jwt
+from jose import jwt, JWTError
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.models.user import UserCreate, UserUpdate, User
 from app.db.models.user import UserModel
+from app.utils.cache import TTLCache
 import logging
 
 logger = logging.getLogger(__name__)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is CPU-bound by design; keep it off the event loop and cap its parallelism
+_bcrypt_executor = ThreadPoolExecutor(
+    max_workers=settings.BCRYPT_WORKERS, thread_name_prefix="bcrypt"
+)
+
+# Shared across requests so repeated auth checks skip JWT decoding and the database
+_token_cache = TTLCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES)
+_active_user_cache = TTLCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES)
+
+
+def get_auth_cache_stats() -> dict:
+    return {
+        "tokens": _token_cache.stats(),
+        "active_users": _active_user_cache.stats(),
+    }
+
+
 class UserService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def get_user_by_email(self, email: str) -> Optional[User]:
-        return self.db.query(UserModel).filter(UserModel.email == email).first()
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        result = await self.db.execute(select(UserModel).where(UserModel.email == email))
+        return result.scalars().first()
 
-    def get_user_by_username(self, username: str) -> Optional[User]:
-        return self.db.query(UserModel).filter(UserModel.username == username).first()
+    async def get_user_by_username(self, username: str) -> Optional[User]:
+        result = await self.db.execute(select(UserModel).where(UserModel.username == username))
+        return result.scalars().first()
 
-    def create_user(self, user: UserCreate) -> User:
+    async def create_user(self, user: UserCreate) -> User:
         """Create a new user"""
         db_user = UserModel(
             email=user.email,
             username=user.username,
-            hashed_password=self.get_password_hash(user.password)
+            hashed_password=await self.get_password_hash(user.password)
         )
         try:
             self.db.add(db_user)
-            self.db.commit()
-            self.db.refresh(db_user)
+            await self.db.commit()
+            await self.db.refresh(db_user)
             logger.info(f"Created new user: {user.username}")
             return db_user
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error creating user: {e}")
             raise
 
-    def authenticate_user(self, username: str, password: str) -> Optional[User]:
+    async def authenticate_user(self, username: str, password: str) -> Optional[User]:
         """Authenticate a user"""
-        user = self.get_user_by_username(username)
+        user = await self.get_user_by_username(username)
         if not user:
             return None
-        if not self.verify_password(password, user.hashed_password):
+        if not await self.verify_password(password, user.hashed_password):
             return None
         return user
 
@@ -56,47 +80,86 @@ class UserService:
         return jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
 
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+    def decode_access_token(token: str) -> Optional[str]:
+        """Return the username in a valid token, caching the result until it expires"""
+        username = _token_cache.get(token)
+        if username is not None:
+            return username
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        except JWTError:
+            return None
+        username = payload.get("sub")
+        if username is None:
+            return None
+        remaining = payload.get("exp", 0) - time.time()
+        if remaining > 0:
+            _token_cache.set(token, username, ttl_seconds=remaining)
+        return username
+
+    async def get_active_user(self, token: str) -> Optional[User]:
+        """Resolve a bearer token to an active user"""
+        username = self.decode_access_token(token)
+        if username is None:
+            return None
+        user = _active_user_cache.get(username)
+        if user is not None:
+            return user
+        db_user = await self.get_user_by_username(username)
+        if not db_user or not db_user.is_active:
+            return None
+        user = User.model_validate(db_user)
+        _active_user_cache.set(username, user)
+        return user
+
+    @staticmethod
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _bcrypt_executor, pwd_context.verify, plain_password, hashed_password
+        )
 
     @staticmethod
-    def get_password_hash(password: str) -> str:
-        return pwd_context.hash(password)
+    async def get_password_hash(password: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_bcrypt_executor, pwd_context.hash, password)
 
-    def update_user(self, username: str, user_update: UserUpdate) -> Optional[User]:
+    async def update_user(self, username: str, user_update: UserUpdate) -> Optional[User]:
         """Update user details"""
-        db_user = self.get_user_by_username(username)
+        db_user = await self.get_user_by_username(username)
         if not db_user:
             return None
 
         update_data = user_update.dict(exclude_unset=True)
         if "password" in update_data:
-            update_data["hashed_password"] = self.get_password_hash(update_data.pop("password"))
+            update_data["hashed_password"] = await self.get_password_hash(update_data.pop("password"))
 
         try:
             for field, value in update_data.items():
                 setattr(db_user, field, value)
-            self.db.commit()
-            self.db.refresh(db_user)
+            await self.db.commit()
+            await self.db.refresh(db_user)
+            _active_user_cache.pop(username)
             logger.info(f"Updated user: {username}")
             return db_user
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error updating user: {e}")
             raise
 
-    def deactivate_user(self, username: str) -> bool:
+    async def deactivate_user(self, username: str) -> bool:
         """Deactivate a user account"""
-        db_user = self.get_user_by_username(username)
+        db_user = await self.get_user_by_username(username)
         if not db_user:
             return False
 
         try:
             db_user.is_active = False
-            self.db.commit()
+            await self.db.commit()
+            _active_user_cache.pop(username)
             logger.info(f"Deactivated user: {username}")
             return True
         except Exception as e:
-            self.db.rollback()
+            await self.db.rollback()
             logger.error(f"Error deactivating user: {e}")
             raise
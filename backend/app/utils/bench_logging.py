@@ -0,0 +1,146 @@
+"""Measure the request-path cost of logging, before and after the queue pipeline.
+
+Usage: python -m app.utils.bench_logging [--records N] [--requests N]
+
+"before" is the old setup (stdout + FileHandler written on the calling thread),
+"after" is setup_logging(). Stdout is redirected to /dev/null for both runs so
+only the handler cost is measured. Records are logged in bursts of half the
+queue capacity and the queue is drained between bursts (untimed), so the
+"after" numbers time the enqueue path rather than the drop path; the drop
+count is printed next to them and should be 0.
+
+The second part times a trivial request through an empty app, through the old
+BaseHTTPMiddleware request-id middleware and through RequestIdMiddleware.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core import logging as app_logging
+from app.core.config import settings
+
+
+def measure(logger: logging.Logger, records: int, burst: int) -> list:
+    timings = []
+    for i in range(records):
+        start = time.perf_counter()
+        logger.info("Processed message in %.2fs", 0.123, extra={"session_id": "bench", "seq": i})
+        timings.append(time.perf_counter() - start)
+        if burst and (i + 1) % burst == 0:
+            wait_for_drain()
+    return timings
+
+
+def wait_for_drain():
+    handler = app_logging._queue_handler
+    while handler is not None and not handler.queue.empty():
+        time.sleep(0.001)
+
+
+def report(name: str, timings: list, note: str = ""):
+    timings = sorted(timings)
+    p99 = timings[max(int(len(timings) * 0.99) - 1, 0)]
+    print(
+        f"{name:<12} mean={statistics.mean(timings) * 1e6:8.1f}us  "
+        f"p50={statistics.median(timings) * 1e6:8.1f}us  p99={p99 * 1e6:8.1f}us  "
+        f"max={timings[-1] * 1e6:9.1f}us  {note}".rstrip()
+    )
+
+
+async def old_request_id_middleware(request: Request, call_next):
+    """The request-id middleware as it was, on BaseHTTPMiddleware"""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = app_logging.request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        app_logging.request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return PlainTextResponse("pong")
+
+    if variant == "base_http":
+        app.middleware("http")(old_request_id_middleware)
+    elif variant == "asgi":
+        app.add_middleware(app_logging.RequestIdMiddleware)
+    return app
+
+
+async def measure_requests(app: FastAPI, requests: int) -> list:
+    timings = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(min(200, requests)):
+            await client.get("/ping")  # warm up
+        for _ in range(requests):
+            start = time.perf_counter()
+            await client.get("/ping")
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("app.services.chat_service")
+    burst = max(settings.LOG_QUEUE_SIZE // 2, 1)
+    real_stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            logging.basicConfig(
+                level=logging.INFO,
+                format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                handlers=[logging.StreamHandler(sys.stdout), logging.FileHandler(os.path.join(tmp, "before.log"))],
+                force=True,
+            )
+            before = measure(logger, args.records, burst=0)
+
+            settings.LOG_FILE = os.path.join(tmp, "after.log")
+            app_logging.setup_logging()
+            after = measure(logger, args.records, burst=burst)
+            stats = app_logging.get_logging_stats()
+
+            # Keep request-path timings free of log output from the apps themselves
+            logging.getLogger().setLevel(logging.WARNING)
+            requests = {
+                variant: asyncio.run(measure_requests(build_app(variant), args.requests))
+                for variant in ("none", "base_http", "asgi")
+            }
+            app_logging.shutdown_logging()
+        finally:
+            sys.stdout = real_stdout
+            logging.basicConfig(force=True, handlers=[logging.StreamHandler(sys.stderr)])
+
+    print(f"log call ({args.records} records, bursts of {burst}, queue capacity {settings.LOG_QUEUE_SIZE})")
+    report("before", before)
+    report("after", after, f"dropped={stats['dropped']}")
+    print(f"request with request-id middleware ({args.requests} requests)")
+    report("none", requests["none"])
+    report("base_http", requests["base_http"])
+    report("asgi", requests["asgi"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
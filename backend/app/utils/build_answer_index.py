@@ -0,0 +1,129 @@
+"""Offline job: mine frequent questions from logged chat traffic and pre-generate answers.
+
+Usage: python -m app.utils.build_answer_index [--days N] [--min-support N] [--dry-run]
+
+Questions are read from chat_messages, grouped by normalized text, embedded and
+clustered greedily by cosine similarity. For every cluster with enough support
+the most frequent phrasing is answered through the normal RAG pipeline, and the
+answer is stored with its source keys so re-ingesting those sources invalidates it.
+The running API picks up the rewritten index file automatically.
+"""
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.models.chat import ChatMessageModel
+from app.db.session import AsyncSessionLocal, engine
+from app.models.chat import MessageRole
+from app.services.answer_index import PrecomputedAnswer, answer_index, normalize_question
+from app.services.chat_service import get_chat_service
+from app.services.rag_service import source_key
+
+
+async def load_questions(days: int) -> Counter:
+    since = datetime.utcnow() - timedelta(days=days)
+    counts: Counter = Counter()
+    phrasing: dict = {}
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(ChatMessageModel.content)
+            .where(ChatMessageModel.role == MessageRole.USER.value)
+            .where(ChatMessageModel.created_at >= since)
+        )
+        async for (content,) in result:
+            key = normalize_question(content)
+            if key:
+                counts[key] += 1
+                phrasing.setdefault(key, Counter())[content.strip()] += 1
+    # Report each normalized question under its most common original phrasing
+    return Counter({phrasing[k].most_common(1)[0][0]: n for k, n in counts.items()})
+
+
+def cluster_questions(
+    questions: List[Tuple[str, int]], embeddings: np.ndarray, threshold: float
+) -> List[dict]:
+    """Greedy clustering in order of frequency; the first member is the representative"""
+    clusters: List[dict] = []
+    centroids: List[np.ndarray] = []
+    for (text, count), vector in zip(questions, embeddings):
+        if centroids:
+            scores = np.stack(centroids) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] >= threshold:
+                clusters[best]["members"].append(text)
+                clusters[best]["support"] += count
+                continue
+        centroids.append(vector)
+        clusters.append({"question": text, "embedding": vector, "members": [text], "support": count})
+    return clusters
+
+
+async def build(days: int, min_support: int, max_entries: int, dry_run: bool) -> int:
+    counts = await load_questions(days)
+    if not counts:
+        print("No logged questions found")
+        return 0
+
+    service = get_chat_service()
+    # Rare one-off questions cannot reach min_support on their own; cap work on the long tail
+    questions = counts.most_common(max_entries * 20)
+    vectors = np.asarray(service.rag_service.embeddings.embed_documents([q for q, _ in questions]), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+
+    clusters = cluster_questions(questions, vectors, settings.ANSWER_CLUSTER_THRESHOLD)
+    frequent = sorted(
+        (c for c in clusters if c["support"] >= min_support), key=lambda c: c["support"], reverse=True
+    )[:max_entries]
+    print(f"{sum(counts.values())} questions, {len(clusters)} clusters, {len(frequent)} frequent")
+    if dry_run:
+        for cluster in frequent:
+            print(f"{cluster['support']:>6}  {cluster['question']}")
+        return 0
+
+    answers = []
+    for cluster in frequent:
+        documents, query_embedding = await service.rag_service.get_context_documents(cluster["question"])
+        if not documents:
+            continue
+        if settings.CONTEXT_COMPRESSION_ENABLED:
+            context = service.compressor.compress(query_embedding, documents).passages
+        else:
+            context = [doc.page_content for doc in documents]
+        answer = await service.ai_service.generate_response_with_context(cluster["question"], context)
+        answers.append(PrecomputedAnswer(
+            question=cluster["question"],
+            answer=answer,
+            embedding=cluster["embedding"].tolist(),
+            sources=context,
+            source_keys=sorted({k for k in (source_key(d.metadata) for d in documents) if k}),
+            aliases=cluster["members"][1:],
+            support=cluster["support"],
+        ))
+
+    answer_index.replace(answers)
+    print(f"Wrote {len(answers)} precomputed answers to {answer_index.path}")
+    return 0
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=settings.ANSWER_MINING_DAYS)
+    parser.add_argument("--min-support", type=int, default=settings.ANSWER_MIN_SUPPORT)
+    parser.add_argument("--max-entries", type=int, default=settings.ANSWER_MAX_ENTRIES)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    try:
+        return await build(args.days, args.min_support, args.max_entries, args.dry_run)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,47 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after a fixed time-to-live"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
@@ -1,23 +1,24 @@
-from sqlalchemy import create_engine
-from app.core.config import settings
+import asyncio
+from sqlalchemy import text
+from app.db.session import engine, get_pool_stats
 import sys
 
-def test_database_connection():
+async def check_database_connection():
     try:
-        # Create engine with the DATABASE_URL from settings
-        engine = create_engine(settings.DATABASE_URL)
-        
-        # Try to connect and execute a simple query
-        with engine.connect() as connection:
-            result = connection.execute("SELECT 1")
+        # Use the shared pooled engine built from DATABASE_URL
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
             print("✅ Successfully connected to the database!")
+            print(f"Pool: {get_pool_stats()}")
             return True
             
     except Exception as e:
         print("❌ Failed to connect to the database!")
         print(f"Error: {str(e)}")
         return False
+    finally:
+        await engine.dispose()
 
 if __name__ == "__main__":
-    success = test_database_connection()
+    success = asyncio.run(check_database_connection())
     sys.exit(0 if success else 1)
@@ -0,0 +1,331 @@
+import re
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional
+
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+HEADING_RE = re.compile(r"^(#{1,6}\s+\S.*|[A-Z0-9][A-Z0-9 .,'&()/-]{2,80}:?)$")
+# Scorelines such as "2-1" or "HT 1-0" look like upper-case headings but are content
+SCORE_RE = re.compile(r"\b\d{1,2}\s*[-\u2013:]\s*\d{1,2}\b")
+TABLE_ROW_RE = re.compile(r"^\s*\|.*\|\s*$|^[^\t]+(\t[^\t]*){2,}$")
+TABLE_RULE_RE = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+SENTENCE_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])")
+WORD_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+LETTER_RE = re.compile(r"[^\W\d_]")
+
+
+@dataclass
+class _Block:
+    kind: str  # "heading", "table" or "text"
+    lines: List[str]
+
+
+@dataclass
+class _Unit:
+    text: str
+    tokens: int
+    kind: str  # "heading", "sentence", "row", "fragment" or "overlap"
+    header: Optional[str] = None  # table header row, repeated when a table spans chunks
+
+
+@dataclass
+class _Pending:
+    units: List[_Unit] = field(default_factory=list)
+    tokens: int = 0
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a paragraph into sentences"""
+    text = " ".join(text.split())
+    if not text:
+        return []
+    return [s for s in SENTENCE_RE.split(text) if s]
+
+
+def is_heading(line: str) -> bool:
+    """Markdown headings, or short upper-case title lines that are not scorelines"""
+    line = line.strip()
+    if not HEADING_RE.match(line) or not LETTER_RE.search(line):
+        return False
+    if len(line.split()) > 12 or line.endswith("."):
+        return False
+    return line.startswith("#") or not SCORE_RE.search(line)
+
+
+class TokenCounter:
+    """Count tokens with the embedding model's tokenizer"""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._tokenizer = None
+        # [CLS] and [SEP] count against the model's sequence limit too
+        self.special_tokens = 2
+        try:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(model_name)
+            self.special_tokens = self._tokenizer.num_special_tokens_to_add(pair=False)
+        except Exception as e:
+            # Offline or missing model: word-piece estimate keeps chunk sizes close
+            logger.warning(f"Tokenizer {model_name} unavailable, estimating tokens: {e}")
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        if self._tokenizer is None:
+            return [len(WORD_PIECE_RE.findall(t)) for t in texts]
+        encoded = self._tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def count(self, text: str) -> int:
+        return self.count_many([text])[0]
+
+
+class StructureAwareChunker:
+    """Token-budgeted chunker that keeps headings, table rows and sentences intact.
+
+    chunk_tokens is the model's maximum sequence length; the special tokens the
+    tokenizer adds are subtracted from it so full chunks are never truncated.
+    """
+
+    def __init__(
+        self,
+        chunk_tokens: int,
+        overlap_tokens: int,
+        model_name: str,
+        counter: Optional[TokenCounter] = None,
+    ):
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.model_name = model_name
+        self.counter = counter or TokenCounter(model_name)
+        self.budget = chunk_tokens - self.counter.special_tokens
+        if overlap_tokens >= self.budget:
+            raise ValueError("overlap_tokens must be smaller than the chunk token budget")
+
+    def split_documents(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Lazily yield chunks for each document"""
+        for doc in documents:
+            yield from self._split_document(doc)
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk.page_content for chunk in self._split_document(Document(page_content=text))]
+
+    def _split_document(self, doc: Document) -> Iterator[Document]:
+        index = 0
+        for section, text in self._chunk_text(doc.page_content):
+            metadata = dict(doc.metadata)
+            metadata["chunk_index"] = index
+            if section:
+                metadata["section"] = section
+            index += 1
+            yield Document(page_content=text, metadata=metadata)
+
+    def _chunk_text(self, text: str) -> Iterator[tuple]:
+        section = None
+        path: List[str] = []
+        previous_kind = None
+        pending = _Pending()
+
+        for unit in self._units(text):
+            if unit.kind == "heading":
+                if previous_kind == "heading":
+                    # Consecutive headings (e.g. "## Lineups" then "### Arsenal") form one section path
+                    path.append(unit.text)
+                else:
+                    # A new section never shares a chunk with the previous one
+                    if _has_content(pending.units):
+                        yield section, self._render(pending.units)
+                    pending = _Pending()
+                    path = [unit.text]
+                section = " > ".join(path)
+                if pending.tokens + unit.tokens > self.budget:
+                    pending = _Pending()
+                pending.units.append(unit)
+                pending.tokens += unit.tokens
+            else:
+                for emitted in self._add(pending, unit):
+                    yield section, emitted
+            previous_kind = unit.kind
+
+        if _has_content(pending.units):
+            yield section, self._render(pending.units)
+
+    def _add(self, pending: _Pending, unit: _Unit) -> Iterator[str]:
+        if pending.tokens + unit.tokens > self.budget and pending.units:
+            # Headings or overlap alone are never worth a chunk of their own
+            if _has_content(pending.units):
+                yield self._render(pending.units)
+                carried = self._overlap(pending.units)
+                pending.units = carried
+                pending.tokens = sum(u.tokens for u in carried)
+                if unit.kind == "row" and unit.header and unit.text != unit.header:
+                    header = _Unit(unit.header, self.counter.count(unit.header), "overlap")
+                    pending.units.insert(0, header)
+                    pending.tokens += header.tokens
+            # Drop the overlap or headings if they would leave no room for the incoming unit
+            if pending.tokens + unit.tokens > self.budget:
+                pending.units = []
+                pending.tokens = 0
+        pending.units.append(unit)
+        pending.tokens += unit.tokens
+
+    def _overlap(self, units: List[_Unit]) -> List[_Unit]:
+        """Carry trailing sentences forward; tables and headings are not repeated"""
+        carried = []
+        tokens = 0
+        for unit in reversed(units):
+            if unit.kind != "sentence" or tokens + unit.tokens > self.overlap_tokens:
+                break
+            carried.insert(0, _Unit(unit.text, unit.tokens, "overlap"))
+            tokens += unit.tokens
+        return carried
+
+    def _units(self, text: str) -> List[_Unit]:
+        """Headings, sentences and table rows of a document, counted in one tokenizer call"""
+        units: List[_Unit] = []
+        paragraph_ends = set()
+        for block in self._blocks(text):
+            if block.kind == "heading":
+                units.append(_Unit(block.lines[0].lstrip("#").strip(), 0, "heading"))
+            elif block.kind == "table":
+                header = block.lines[0].strip() + "\n"
+                for line in block.lines:
+                    if not TABLE_RULE_RE.match(line):
+                        units.append(_Unit(line.strip(), 0, "row", header=header))
+            else:
+                sentences = split_sentences(" ".join(block.lines))
+                units.extend(_Unit(sentence, 0, "sentence") for sentence in sentences)
+                if sentences:
+                    paragraph_ends.add(len(units) - 1)
+
+        for unit, tokens in zip(units, self.counter.count_many([u.text for u in units])):
+            unit.tokens = tokens
+
+        result: List[_Unit] = []
+        for i, unit in enumerate(units):
+            parts = [unit] if unit.tokens <= self.budget or unit.kind == "heading" else self._hard_split(unit.text)
+            if unit.kind == "row":
+                parts[-1].text += "\n"
+            if i in paragraph_ends:
+                parts[-1].text += "\n\n"
+            result.extend(parts)
+        return result
+
+    def _hard_split(self, text: str) -> List[_Unit]:
+        """Fallback for a single sentence or row longer than the whole budget"""
+        words = text.split()
+        counts = self.counter.count_many(words)
+        units = []
+        current: List[str] = []
+        tokens = 0
+        for word, n in zip(words, counts):
+            if current and tokens + n > self.budget:
+                units.append(_Unit(" ".join(current), tokens, "fragment"))
+                current, tokens = [], 0
+            current.append(word)
+            tokens += n
+        if current:
+            units.append(_Unit(" ".join(current), tokens, "fragment"))
+        return units
+
+    @staticmethod
+    def _render(units: List[_Unit]) -> str:
+        parts: List[str] = []
+        for unit in units:
+            if parts and not parts[-1].endswith("\n"):
+                parts.append("\n" if unit.kind == "row" else " ")
+            parts.append(unit.text + "\n" if unit.kind == "heading" else unit.text)
+        return "".join(parts).strip()
+
+    @staticmethod
+    def _blocks(text: str) -> Iterator[_Block]:
+        """Group lines into heading, table and paragraph blocks"""
+        current: Optional[_Block] = None
+        for raw in text.splitlines():
+            line = raw.rstrip()
+            if not line.strip():
+                if current:
+                    yield current
+                current = None
+                continue
+
+            if TABLE_ROW_RE.match(line) or (current and current.kind == "table" and TABLE_RULE_RE.match(line)):
+                kind = "table"
+            elif is_heading(line):
+                kind = "heading"
+            else:
+                kind = "text"
+
+            if kind == "heading":
+                if current:
+                    yield current
+                current = None
+                yield _Block("heading", [line.strip()])
+            elif current and current.kind == kind:
+                current.lines.append(line)
+            else:
+                if current:
+                    yield current
+                current = _Block(kind, [line])
+        if current:
+            yield current
+
+
+def _has_content(units: List[_Unit]) -> bool:
+    return any(unit.kind not in ("heading", "overlap") for unit in units)
+
+
+_worker_chunker: Optional[StructureAwareChunker] = None
+
+
+def _init_worker(chunk_tokens: int, overlap_tokens: int, model_name: str):
+    global _worker_chunker
+    _worker_chunker = StructureAwareChunker(chunk_tokens, overlap_tokens, model_name)
+
+
+def _split_in_worker(docs: List[Document]) -> List[Document]:
+    return list(_worker_chunker.split_documents(docs))
+
+
+def split_documents_parallel(
+    chunker: StructureAwareChunker,
+    documents: Iterable[Document],
+    workers: int,
+    batch_size: int = 16,
+) -> Iterator[Document]:
+    """Chunk documents across processes, yielding results in input order.
+
+    At most 2 x workers batches are in flight, so the input is read lazily
+    instead of being materialised up front as ProcessPoolExecutor.map would.
+    """
+    if workers <= 1:
+        yield from chunker.split_documents(documents)
+        return
+
+    documents = iter(documents)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(chunker.chunk_tokens, chunker.overlap_tokens, chunker.model_name),
+    ) as pool:
+        pending = deque()
+        while True:
+            while len(pending) < 2 * workers:
+                batch = list(islice(documents, batch_size))
+                if not batch:
+                    break
+                pending.append(pool.submit(_split_in_worker, batch))
+            if not pending:
+                return
+            yield from pending.popleft().result()
@@ -0,0 +1,153 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected, Priority, get_request_timeout
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_controller(**kwargs) -> AdmissionController:
+    options = {
+        "llm_concurrency": 1,
+        "cheap_concurrency": 1,
+        "per_client_limit": 5,
+        "queue_size": 2,
+        "max_wait_seconds": 5.0,
+    }
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+async def hold(controller: AdmissionController, client_id: str, started: asyncio.Event, release: asyncio.Event):
+    async with controller.admit(client_id):
+        started.set()
+        await release.wait()
+
+
+async def test_queue_full_is_rejected_with_503():
+    controller = make_controller(queue_size=1)
+    started, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold(controller, "a", started, release))
+    await started.wait()
+    queued = asyncio.create_task(hold(controller, "b", asyncio.Event(), release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        async with controller.admit("c"):
+            pass
+    assert rejected.value.status_code == 503
+    assert rejected.value.retry_after >= 1
+
+    release.set()
+    await asyncio.gather(holder, queued)
+    lane = controller.stats()["lanes"]["llm"]
+    assert lane["rejected_queue_full"] == 1
+    assert lane["active"] == 0 and lane["queued"] == 0
+
+
+async def test_per_client_limit_is_rejected_with_429():
+    controller = make_controller(llm_concurrency=4, per_client_limit=1)
+    started, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold(controller, "a", started, release))
+    await started.wait()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        async with controller.admit("a"):
+            pass
+    assert rejected.value.status_code == 429
+
+    # Other clients and the cheap lane are unaffected
+    async with controller.admit("b"):
+        pass
+    async with controller.admit("a", Priority.CHEAP):
+        pass
+
+    release.set()
+    await holder
+    assert controller.stats()["clients_in_flight"] == 0
+    assert controller.stats()["rejected_client_limit"] == 1
+
+
+async def test_waiter_expires_in_queue():
+    controller = make_controller(max_wait_seconds=0.05)
+    # Keep the estimated wait under the budget so the request is queued, not shed
+    controller._lanes[Priority.LLM].avg_service_s = 0.01
+    started, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold(controller, "a", started, release))
+    await started.wait()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        async with controller.admit("b"):
+            pass
+    assert rejected.value.status_code == 503
+
+    release.set()
+    await holder
+    stats = controller.stats()
+    assert stats["lanes"]["llm"]["expired_in_queue"] == 1
+    assert stats["lanes"]["llm"]["active"] == 0
+    assert stats["clients_in_flight"] == 0
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    controller = make_controller()
+    started, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold(controller, "a", started, release))
+    await started.wait()
+
+    waiter = asyncio.create_task(hold(controller, "b", asyncio.Event(), release))
+    await asyncio.sleep(0)
+    assert controller.stats()["lanes"]["llm"]["queued"] == 1
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert controller.stats()["lanes"]["llm"]["queued"] == 0
+
+    # The slot still passes to the next caller once the holder finishes
+    release.set()
+    await holder
+    async with controller.admit("c"):
+        pass
+    stats = controller.stats()
+    assert stats["lanes"]["llm"]["active"] == 0
+    assert stats["clients_in_flight"] == 0
+
+
+async def test_slot_handed_to_waiter_after_release():
+    controller = make_controller()
+    started, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold(controller, "a", started, release))
+    await started.wait()
+
+    second_started = asyncio.Event()
+    second = asyncio.create_task(hold(controller, "b", second_started, release))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.wait_for(second_started.wait(), timeout=1)
+    await asyncio.gather(holder, second)
+    assert controller.stats()["lanes"]["llm"]["admitted"] == 2
+
+
+async def test_zero_timeout_does_not_queue():
+    controller = make_controller()
+    started, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold(controller, "a", started, release))
+    await started.wait()
+
+    with pytest.raises(AdmissionRejected):
+        async with controller.admit("b", timeout=0):
+            pass
+    assert controller.stats()["lanes"]["llm"]["queued"] == 0
+
+    release.set()
+    await holder
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None), ("2.5", 2.5), ("0", 0.0), ("-1", None), ("nan", None), ("inf", None), ("soon", None),
+])
+async def test_request_timeout_header(header, expected):
+    headers = {} if header is None else {"X-Request-Timeout": header}
+    assert get_request_timeout(SimpleNamespace(headers=headers)) == expected
@@ -0,0 +1,141 @@
+import pytest
+from sqlalchemy import select
+
+from app.db.models.chat import ChatMessageModel, ChatSessionModel
+from app.models.chat import ChatMessage, MessageRole
+from app.services.chat_persistence import ChatWriteBuffer
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_buffer(session_factory, **kwargs) -> ChatWriteBuffer:
+    options = {"batch_size": 100, "flush_interval": 1.0, "max_pending": 100, "append_timeout": 0.01}
+    options.update(kwargs)
+    return ChatWriteBuffer(session_factory, **options)
+
+
+def turn(question: str = "Who won?", answer: str = "Arsenal") -> list:
+    return [
+        ChatMessage(role=MessageRole.USER, content=question),
+        ChatMessage(role=MessageRole.ASSISTANT, content=answer),
+    ]
+
+
+class FailingSessionFactory:
+    """Session factory whose first `failures` sessions raise on use"""
+
+    def __init__(self, session_factory, failures: int):
+        self.session_factory = session_factory
+        self.failures = failures
+
+    def __call__(self):
+        if self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("write failed")
+        return self.session_factory()
+
+
+async def test_flush_writes_sessions_and_messages(session_factory):
+    buffer = make_buffer(session_factory)
+    await buffer.append("s1", turn())
+    await buffer.append("s1", turn("And the score?", "2-1"))
+    await buffer.append("s2", turn())
+
+    assert await buffer.flush()
+
+    async with session_factory() as db:
+        sessions = {s.session_id: s for s in (await db.execute(select(ChatSessionModel))).scalars()}
+        messages = (await db.execute(select(ChatMessageModel).order_by(ChatMessageModel.id))).scalars().all()
+    assert sessions["s1"].message_count == 4
+    assert sessions["s2"].message_count == 2
+    assert [m.content for m in messages[:4]] == ["Who won?", "Arsenal", "And the score?", "2-1"]
+    assert buffer.stats()["written"] == 6
+    assert buffer.stats()["pending"] == 0
+
+
+async def test_flush_upserts_existing_session(session_factory):
+    buffer = make_buffer(session_factory)
+    await buffer.append("s1", turn())
+    assert await buffer.flush()
+    await buffer.append("s1", turn())
+    assert await buffer.flush()
+
+    async with session_factory() as db:
+        session = (await db.execute(select(ChatSessionModel))).scalars().one()
+    assert session.message_count == 4
+
+
+async def test_failed_batch_is_requeued(session_factory):
+    buffer = make_buffer(FailingSessionFactory(session_factory, failures=1))
+    await buffer.append("s1", turn())
+
+    assert not await buffer.flush()
+    assert buffer.stats()["pending"] == 2
+    assert buffer.stats()["failed_flushes"] == 1
+
+    assert await buffer.flush()
+    async with session_factory() as db:
+        contents = (await db.execute(select(ChatMessageModel.content).order_by(ChatMessageModel.id))).scalars().all()
+    assert contents == ["Who won?", "Arsenal"]
+
+
+async def test_rejected_rows_are_dropped_after_max_retries(session_factory):
+    buffer = make_buffer(session_factory, max_retries=2)
+    await buffer.append("s1", turn())
+    # A NULL content violates the NOT NULL constraint on every attempt
+    buffer._pending.insert(1, ("s1", None, "user", None, buffer._pending[0][4]))
+
+    assert not await buffer.flush()
+    assert not await buffer.flush()
+    assert await buffer.flush()
+
+    stats = buffer.stats()
+    assert stats["rejected"] == 1
+    assert stats["written"] == 2
+    assert stats["pending"] == 0
+
+
+async def test_append_strips_nul_characters(session_factory):
+    buffer = make_buffer(session_factory)
+    await buffer.append("s1", turn("Who\x00 won?"))
+    assert buffer._pending[0][3] == "Who won?"
+
+
+async def test_append_drops_when_full(session_factory):
+    buffer = make_buffer(session_factory, max_pending=3)
+    assert await buffer.append("s1", turn())
+    assert not await buffer.append("s1", turn())
+
+    stats = buffer.stats()
+    assert stats["pending"] == 2
+    assert stats["dropped"] == 2
+
+
+async def test_load_session_returns_stored_then_buffered_messages(session_factory):
+    buffer = make_buffer(session_factory)
+    await buffer.append("s1", turn())
+    await buffer.append("s2", turn("Other session", "ignored"))
+    assert await buffer.flush()
+    await buffer.append("s1", turn("And the score?", "2-1"))
+
+    history = await buffer.load_session("s1")
+
+    assert [m.content for m in history] == ["Who won?", "Arsenal", "And the score?", "2-1"]
+    assert [m.role for m in history[:2]] == [MessageRole.USER, MessageRole.ASSISTANT]
+    assert all(m.session_id == "s1" and m.timestamp.tzinfo is None for m in history)
+    assert await buffer.load_session("unknown") == []
+
+
+async def test_delete_session_removes_stored_and_buffered_messages(session_factory):
+    buffer = make_buffer(session_factory)
+    await buffer.append("s1", turn())
+    await buffer.append("s2", turn())
+    assert await buffer.flush()
+    await buffer.append("s1", turn("And the score?", "2-1"))
+
+    assert await buffer.delete_session("s1")
+
+    assert await buffer.load_session("s1") == []
+    assert [m.content for m in await buffer.load_session("s2")] == ["Who won?", "Arsenal"]
+    assert buffer.stats()["pending"] == 0
+    assert not await buffer.delete_session("s1")
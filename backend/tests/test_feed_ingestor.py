@@ -0,0 +1,128 @@
+import json
+
+from app.services.feed_ingestor import FeedIngestor
+
+
+class FakeVectorDB:
+    def persist(self):
+        pass
+
+
+class FakeRAGService:
+    """Records upserts; rejects any batch containing a key in `reject`"""
+
+    def __init__(self, reject=(), fail_all=False):
+        self.reject = set(reject)
+        self.fail_all = fail_all
+        self.upserted = {}
+        self.deleted = []
+        self.vector_db = FakeVectorDB()
+
+    def upsert_documents(self, documents):
+        if self.fail_all:
+            raise RuntimeError("index unavailable")
+        bad = self.reject.intersection(documents)
+        if bad:
+            raise ValueError(f"rejected {sorted(bad)}")
+        self.upserted.update(documents)
+        return len(documents)
+
+    def delete_documents(self, keys):
+        self.deleted.extend(keys)
+
+    def expire_documents(self, now=None):
+        pass
+
+    def _load_file(self, path):
+        return []
+
+
+def write_feed(path, lines):
+    with open(path, "a", encoding="utf-8") as f:
+        for line in lines:
+            f.write((line if isinstance(line, str) else json.dumps(line)) + "\n")
+
+
+def make_ingestor(rag_service, path, **kwargs) -> FeedIngestor:
+    options = {"poll_interval": 1.0, "batch_size": 10, "expiry_interval": 3600.0, "max_retries": 2}
+    options.update(kwargs)
+    return FeedIngestor(rag_service, str(path), **options)
+
+
+def test_invalid_items_are_skipped(tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    write_feed(feed, [
+        {"key": "a", "text": "Arsenal 2-1 Chelsea"},
+        ["oops"],
+        {"key": "b", "text": 123},
+        {"key": "c", "text": "Team news", "source": {"site": "bbc"}},
+        {"key": 7, "text": "numeric key"},
+        {"key": "d", "text": "bad date", "published_at": "yesterday"},
+        "not json",
+        {"key": "e", "text": "Spurs 0-0 Everton"},
+    ])
+    rag = FakeRAGService()
+    ingestor = make_ingestor(rag, feed)
+
+    ingestor.poll_once()
+
+    assert sorted(rag.upserted) == ["a", "e"]
+    assert ingestor.stats()["errors"] == 6
+    assert ingestor._offsets[str(feed)] == feed.stat().st_size
+
+
+def test_deletes_and_later_updates_win(tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    write_feed(feed, [
+        {"key": "a", "text": "first"},
+        {"key": "a", "text": "second"},
+        {"key": "b", "text": "gone"},
+        {"key": "b", "delete": True},
+    ])
+    rag = FakeRAGService()
+    make_ingestor(rag, feed).poll_once()
+
+    assert rag.upserted["a"].page_content == "second"
+    assert "b" not in rag.upserted
+    assert rag.deleted == ["b"]
+
+
+def test_failed_poll_does_not_advance_offsets(tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    write_feed(feed, [{"key": "a", "text": "Arsenal 2-1 Chelsea"}])
+    rag = FakeRAGService(fail_all=True)
+    ingestor = make_ingestor(rag, feed)
+
+    try:
+        ingestor.poll_once()
+    except RuntimeError:
+        pass
+    assert ingestor._offsets == {}
+
+    rag.fail_all = False
+    ingestor.poll_once()
+    assert list(rag.upserted) == ["a"]
+
+
+def test_rejected_item_is_isolated_after_max_retries(tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    write_feed(feed, [{"key": "a", "text": "good"}, {"key": "bad", "text": "bad"}, {"key": "c", "text": "good"}])
+    rag = FakeRAGService(reject={"bad"})
+    ingestor = make_ingestor(rag, feed, max_retries=2)
+
+    for _ in range(2):
+        try:
+            ingestor.poll_once()
+        except ValueError:
+            pass
+    assert rag.upserted == {}
+
+    ingestor.poll_once()
+    assert sorted(rag.upserted) == ["a", "c"]
+    assert ingestor.stats()["rejected"] == 1
+    assert ingestor._offsets[str(feed)] == feed.stat().st_size
+
+    # Later items go back to normal batched upserts
+    write_feed(feed, [{"key": "d", "text": "more"}])
+    ingestor.poll_once()
+    assert "d" in rag.upserted
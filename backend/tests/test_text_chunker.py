@@ -0,0 +1,112 @@
+from langchain.schema import Document
+
+from app.utils.text_chunker import WORD_PIECE_RE, StructureAwareChunker, is_heading, split_sentences
+
+
+class WordPieceCounter:
+    """Tokenizer stand-in: one token per word or punctuation mark, plus [CLS]/[SEP]"""
+
+    special_tokens = 2
+
+    def count_many(self, texts):
+        return [len(WORD_PIECE_RE.findall(t)) for t in texts]
+
+    def count(self, text):
+        return self.count_many([text])[0]
+
+
+def make_chunker(chunk_tokens: int = 64, overlap_tokens: int = 8) -> StructureAwareChunker:
+    return StructureAwareChunker(chunk_tokens, overlap_tokens, "test", counter=WordPieceCounter())
+
+
+def chunk(text: str, **kwargs) -> list:
+    return list(make_chunker(**kwargs).split_documents([Document(page_content=text, metadata={"source": "r.txt"})]))
+
+
+REPORT = """# Arsenal v Chelsea
+
+FINAL SCORE
+2-1
+
+HT 1-0
+
+PLAYER STATS
+| Player | Minutes | Shots |
+|---|---|---|
+| Saka | 90 | 3 |
+| Rice | 88 | 1 |
+
+## Lineups
+### Arsenal
+Raya, White, Saliba, Gabriel and Zinchenko started at the back.
+"""
+
+
+def test_heading_detection():
+    assert is_heading("FINAL SCORE")
+    assert is_heading("## Lineups")
+    assert is_heading("2023-24 SEASON")
+    assert not is_heading("2-1")
+    assert not is_heading("HT 1-0")
+    assert not is_heading("90")
+    assert not is_heading("ARSENAL WON.")
+    assert not is_heading("Saka scored twice")
+
+
+def test_score_lines_stay_content():
+    chunks = chunk(REPORT)
+    sections = [c.metadata.get("section") for c in chunks]
+    assert "2-1" not in sections and "HT 1-0" not in sections
+    score = next(c for c in chunks if "2-1" in c.page_content)
+    assert "FINAL SCORE" in score.page_content and "HT 1-0" in score.page_content
+    table = next(c for c in chunks if "| Saka |" in c.page_content)
+    assert table.metadata["section"] == "PLAYER STATS"
+
+
+def test_consecutive_headings_form_one_section():
+    chunks = chunk(REPORT)
+    lineup = next(c for c in chunks if "Saliba" in c.page_content)
+    assert lineup.metadata["section"] == "Lineups > Arsenal"
+    assert lineup.page_content.startswith("Lineups\nArsenal\n")
+    assert [c.metadata["section"] for c in chunks][0] == "Arsenal v Chelsea > FINAL SCORE"
+
+
+def test_no_heading_only_chunks():
+    text = "# Title\n\n## Empty section\n\nGOALS\n" + "Saka scored a fine goal in the first half. " * 20
+    for c in chunk(text, chunk_tokens=40):
+        lines = [line for line in c.page_content.splitlines() if line.strip()]
+        assert not all(is_heading(line) for line in lines), c.page_content
+
+
+def test_chunks_fit_model_limit_with_special_tokens():
+    text = "\n\n".join(
+        " ".join(f"Sentence {i}-{j} about the match went on for a while." for j in range(12)) for i in range(6)
+    )
+    counter = WordPieceCounter()
+    chunks = chunk(text, chunk_tokens=64)
+    assert len(chunks) > 1
+    for c in chunks:
+        assert counter.count(c.page_content) + counter.special_tokens <= 64
+
+
+def test_sentences_are_not_broken():
+    text = " ".join(f"Player {i} completed {i + 10} passes." for i in range(60))
+    sentences = set(split_sentences(text))
+    for c in chunk(text, chunk_tokens=48):
+        assert set(split_sentences(c.page_content)) <= sentences
+
+
+def test_table_header_repeats_when_table_spans_chunks():
+    rows = "\n".join(f"| Player {i} | {60 + i} | {i % 4} |" for i in range(30))
+    text = f"PLAYER STATS\n| Player | Minutes | Shots |\n|---|---|---|\n{rows}\n"
+    chunks = chunk(text, chunk_tokens=64)
+    assert len(chunks) > 1
+    for c in chunks[1:]:
+        assert c.page_content.startswith("| Player | Minutes | Shots |")
+        assert c.metadata["section"] == "PLAYER STATS"
+
+
+def test_chunk_metadata():
+    chunks = chunk(REPORT)
+    assert [c.metadata["chunk_index"] for c in chunks] == list(range(len(chunks)))
+    assert all(c.metadata["source"] == "r.txt" for c in chunks)
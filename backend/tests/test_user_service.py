@@ -0,0 +1,101 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from jose import jwt
+
+from app.core.config import settings
+from app.models.user import UserCreate, UserUpdate
+from app.services import user_service
+from app.services.user_service import UserService
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_caches():
+    user_service._token_cache.clear()
+    user_service._active_user_cache.clear()
+    yield
+    user_service._token_cache.clear()
+    user_service._active_user_cache.clear()
+
+
+@pytest_asyncio.fixture
+async def service(session_factory):
+    async with session_factory() as db:
+        yield UserService(db)
+
+
+async def create_alice(service: UserService):
+    return await service.create_user(
+        UserCreate(email="alice@example.com", username="alice", password="correct-horse")
+    )
+
+
+def token_expiring_in(seconds: float) -> str:
+    return jwt.encode({"sub": "alice", "exp": int(time.time() + seconds)}, settings.SECRET_KEY, algorithm="HS256")
+
+
+async def test_create_and_authenticate(service):
+    created = await create_alice(service)
+    assert created.hashed_password != "correct-horse"
+
+    assert (await service.authenticate_user("alice", "correct-horse")).id == created.id
+    assert await service.authenticate_user("alice", "wrong-password") is None
+    assert await service.authenticate_user("bob", "correct-horse") is None
+
+
+async def test_get_active_user_is_cached(service):
+    await create_alice(service)
+    token = service.create_access_token("alice")
+
+    first = await service.get_active_user(token)
+    second = await service.get_active_user(token)
+
+    assert first.username == second.username == "alice"
+    assert user_service._active_user_cache.stats()["hits"] == 1
+    assert user_service._token_cache.stats()["hits"] == 1
+
+
+async def test_update_invalidates_cached_user(service):
+    await create_alice(service)
+    token = service.create_access_token("alice")
+    await service.get_active_user(token)
+
+    await service.update_user("alice", UserUpdate(email="alice@example.org"))
+
+    assert (await service.get_active_user(token)).email == "alice@example.org"
+
+
+async def test_deactivate_invalidates_cached_user(service):
+    await create_alice(service)
+    token = service.create_access_token("alice")
+    assert await service.get_active_user(token) is not None
+
+    assert await service.deactivate_user("alice")
+
+    assert await service.get_active_user(token) is None
+
+
+async def test_cached_token_expires_with_the_token(monkeypatch):
+    # Offsets between local time and UTC must not stretch the cache lifetime
+    monkeypatch.setenv("TZ", "Asia/Ho_Chi_Minh")
+    time.tzset()
+    try:
+        token = token_expiring_in(5)
+        assert UserService.decode_access_token(token) == "alice"
+        expires_at, _ = user_service._token_cache._data[token]
+        assert expires_at - time.monotonic() <= 5
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+async def test_expired_token_is_rejected_and_not_cached():
+    token = jwt.encode(
+        {"sub": "alice", "exp": datetime.utcnow() - timedelta(seconds=1)}, settings.SECRET_KEY, algorithm="HS256"
+    )
+    assert UserService.decode_access_token(token) is None
+    assert user_service._token_cache.stats()["entries"] == 0
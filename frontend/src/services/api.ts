@@ -16,8 +16,11 @@ export const chatApi = {
     return response.data
   },
 
-  getHistory: async (sessionId: string): Promise<ChatMessage[]> => {
-    const response = await api.get(`/chat/history/${sessionId}`)
+  getHistory: async (
+    sessionId: string,
+    params?: { since?: string; cursor?: number; limit?: number }
+  ): Promise<ChatMessage[]> => {
+    const response = await api.get(`/chat/history/${sessionId}`, { params })
     return response.data
   },
 
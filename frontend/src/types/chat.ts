@@ -18,6 +18,7 @@ export interface ChatResponse {
   timestamp: string
   sources?: string[]
   processing_time?: number
+  context_compression?: Record<string, number>
 }
 
 export interface ChatSession {